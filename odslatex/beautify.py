@@ -0,0 +1,141 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets 
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import re
+
+column_separator = re.compile(r'(?<!\\)&')
+
+def beautify_body(body):
+    '''
+    Align the columns of the body of a tabular environment.
+    '''
+
+    lines = body.split('\n')
+
+    # Split on the column separators only, not on escaped ampersands (\&)
+    return beautify_lines([column_separator.split(line) for line in lines])
+
+def beautify_lines(lines):
+    '''
+    Align the columns of a tabular body given as a list of lines, each of them
+    a list with the code of its cells (see Table.latex_lines). The code of the
+    cells is not modified, so it can come straight from a RenderCache.
+    '''
+
+    data = [list(map(lambda x: x.strip(), line)) for line in lines]
+
+    # Maximum number of columns (there should be at least one line without 
+    # merged columns)
+    maxcols = max(list(map(len, data)))
+
+    lines_dict = {
+            'merged' : [],
+            'full'   : [],
+            'single' : []
+            }
+
+    kind_list = []
+
+    # Separate lines according to the number of columns they have
+    for elem in data:
+        if any(map(lambda x: 'multicolumn' in x, elem)) and len(elem) < maxcols:
+            lines_dict['merged'].append(elem)
+            kind_list.append('merged')
+        elif len(elem) == maxcols:
+            lines_dict['full'].append(elem)
+            kind_list.append('full')
+        elif len(elem) == 1:
+            lines_dict['single'].append(elem)
+            kind_list.append('single')
+        else:
+            raise Exception('Something''s wrong with line ', elem)
+
+    # Now determine the maximum length of each column in the full lines (i.e.),
+    # lines that contain the maximum number of columns (because they don't 
+    # have multicolumn environments)
+    lens = []
+    for elem in lines_dict['full']:
+        lens.append(list(map(len, elem)))
+
+    lens2 = list(map(list, zip(*lens)))
+
+    # Determine the maximum length of each column (only full columns)
+    maxlens = list(map(max, lens2))
+
+    # Now see if the compacted columns can be fit into those lengths. If not,
+    # update them. We make the rightmost element grow until it fits.
+    merged_fmt_strs = []
+    ncols_list = []
+
+    for elem in lines_dict['merged']:
+
+        x = 0
+        curr_ncols_list = []
+        for n, cell in enumerate(elem):
+            m = re.search(r'\\multicolumn\{(.*?)\}', cell)
+            ncols = 1
+            if m:
+                ncols = int(m.group(1))
+
+            curr_ncols_list.append(ncols)
+
+            maxlen = sum(maxlens[x:x+ncols])
+            dif = len(cell) - maxlen
+            if dif > 0:
+                maxlens[x+ncols-1] += dif
+
+            x += ncols
+
+        ncols_list.append(curr_ncols_list)
+
+    # With the updated maximum lengths on each column, prepare a list with the
+    # format strings for the lines with merged columns
+    for n, elem in enumerate(lines_dict['merged']):
+        curr_fmt_str = ''
+        x = 0
+        for m, cell in enumerate(elem):
+            ncols = ncols_list[n][m]
+            maxlen = sum(maxlens[x:x+ncols]) + (ncols-1)*3 # Add space for ' & '
+
+            curr_fmt_str += '{{:{}{:d}}}'.format('^' if ncols > 1 else '', max(maxlen, len(cell)))
+
+            if m != len(elem)-1:
+                curr_fmt_str += ' & '
+
+            x += ncols
+
+        merged_fmt_strs.append(curr_fmt_str)
+
+    fmt_str = ''
+    for n, l in enumerate(maxlens):
+        fmt_str += '{{:{:d}}}'.format(l)
+        if n != len(maxlens)-1:
+            fmt_str += ' & '
+    
+    body = ''
+    for kind in kind_list:
+        elem = lines_dict[kind].pop(0)
+        if kind == 'full':
+            body += fmt_str.format(*elem) + '\n'
+        elif kind == 'single':
+            body += elem[0] + '\n'
+        elif kind == 'merged':
+            body += merged_fmt_strs.pop(0).format(*elem) + '\n'
+
+    return body
@@ -0,0 +1,244 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+
+# Number of rows unpacked at a time by the operations over the whole grid
+CHUNK_ROWS = 4096
+
+def unpack(row, w):
+    return np.unpackbits(np.frombuffer(row, dtype=np.uint8), count=w,
+            bitorder='little').view(bool)
+
+def pack(values):
+    return bytearray(np.packbits(values, bitorder='little').tobytes())
+
+class BorderGrid:
+    def __init__(self, h, w):
+        '''
+        Create a grid of <h> x <w> boolean values, all False, used to store
+        the borders of a table.
+
+        Each row is stored bit-packed in its own bytearray. This takes eight
+        times less memory than a boolean array, and inserting a row only
+        moves references to the rows, without copying the grid.
+
+        The grid can be indexed like a 2D NumPy array with [y,x], [y,x0:x1]
+        and [y] (the last two return copies of the values), and converted to
+        a boolean array with np.asarray.
+        '''
+
+        self.h = h
+        self.w = w
+        self.rows = [bytearray((w+7)//8) for _ in range(h)]
+
+    @property
+    def shape(self):
+        return (self.h, self.w)
+
+    @property
+    def nbytes(self):
+        return sum(map(len, self.rows))
+
+    def row(self, y):
+        '''
+        Return row <y> as a boolean array.
+        '''
+
+        return unpack(self.rows[y], self.w)
+
+    def row_bytes(self, y):
+        '''
+        Return row <y> in its packed form. Two rows are equal if and only if
+        their packed forms are.
+        '''
+
+        return bytes(self.rows[y])
+
+    def any(self, y):
+        '''
+        Return True if some value of row <y> is True, without unpacking it.
+        '''
+
+        return any(self.rows[y])
+
+    def _column(self, x):
+        if x < 0:
+            x += self.w
+        if not 0 <= x < self.w:
+            raise IndexError('index {:d} is out of bounds for a grid of width {:d}'.format(x, self.w))
+        return x
+
+    def get(self, y, x):
+        x = self._column(x)
+        return bool((self.rows[y][x >> 3] >> (x & 7)) & 1)
+
+    def set(self, y, x, value):
+        x = self._column(x)
+        if value:
+            self.rows[y][x >> 3] |= 1 << (x & 7)
+        else:
+            self.rows[y][x >> 3] &= 0xFF ^ (1 << (x & 7))
+
+    def set_range(self, y, x0, x1, value):
+        '''
+        Set the values of row <y> from column <x0> to <x1> (excluded), like
+        a slice: the part of the range outside the grid is ignored. Only the
+        bytes of the range are modified, without unpacking the row.
+        '''
+
+        x0 = max(x0, 0)
+        x1 = min(x1, self.w)
+        if x1 <= x0:
+            return
+
+        # Masks of the bits of the range in its first and last bytes. The
+        # bytes in between are overwritten as a whole.
+        row = self.rows[y]
+        first, last = x0 >> 3, (x1-1) >> 3
+        head = (0xFF << (x0 & 7)) & 0xFF
+        tail = 0xFF >> (7 - ((x1-1) & 7))
+
+        if first == last:
+            head &= tail
+
+        if value:
+            row[first] |= head
+            if last > first:
+                row[first+1:last] = b'\xff'*(last-first-1)
+                row[last] |= tail
+        else:
+            row[first] &= 0xFF ^ head
+            if last > first:
+                row[first+1:last] = bytes(last-first-1)
+                row[last] &= 0xFF ^ tail
+
+    def set_column(self, x, y0, y1, value):
+        '''
+        Set the values of column <x> from row <y0> to <y1> (excluded).
+        '''
+
+        for y in range(y0, y1):
+            self.set(y, x, value)
+
+    def column_counts(self):
+        '''
+        Return an array with the number of True values in each column.
+        '''
+
+        counts = np.zeros(self.w, dtype=np.int64)
+        for start in range(0, self.h, CHUNK_ROWS):
+            counts += self._unpack_rows(start, start+CHUNK_ROWS).sum(axis=0)
+
+        return counts
+
+    def insert_row(self, pos, copy_from=None):
+        '''
+        Insert a row before row <pos>, with the values of row <copy_from>
+        (all False by default).
+        '''
+
+        if copy_from is None:
+            row = bytearray((self.w+7)//8)
+        else:
+            row = bytearray(self.rows[copy_from])
+
+        self.rows.insert(pos, row)
+        self.h += 1
+
+    def insert_column(self, pos, copy_from=None):
+        '''
+        Insert a column before column <pos>, with the values of column
+        <copy_from> (all False by default). Only the bytes of each row from
+        column <pos> on are rewritten.
+        '''
+
+        first = pos >> 3
+        offset = 8*first
+        for y, row in enumerate(self.rows):
+            tail = unpack(row[first:], self.w - offset)
+            value = False if copy_from is None else self.get(y, copy_from)
+            row[first:] = pack(np.insert(tail, pos - offset, value))
+
+        self.w += 1
+
+    def tobytes(self):
+        '''
+        Return all the packed rows, one after the other.
+        '''
+
+        return b''.join(self.rows)
+
+    @classmethod
+    def frombuffer(cls, buffer, h, w):
+        '''
+        Create a grid of <h> x <w> values from the packed rows in <buffer>,
+        as returned by tobytes.
+        '''
+
+        grid = cls(0, w)
+        nbytes = (w+7)//8
+        buffer = memoryview(buffer)
+        grid.rows = [bytearray(buffer[y*nbytes:(y+1)*nbytes]) for y in range(h)]
+        grid.h = h
+
+        return grid
+
+    def _unpack_rows(self, start, stop):
+        rows = self.rows[start:stop]
+        packed = np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(len(rows), (self.w+7)//8)
+        return np.unpackbits(packed, axis=1, count=self.w, bitorder='little').view(bool)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self.row(key)
+
+        y, x = key
+        if isinstance(y, slice):
+            return np.asarray(self)[key]
+        if isinstance(x, slice):
+            return self.row(y)[x]
+        return self.get(y, int(x))
+
+    def __setitem__(self, key, value):
+        y, x = key
+        if isinstance(y, slice):
+            for y in range(*y.indices(self.h)):
+                self[y, x] = value
+        elif isinstance(x, slice):
+            x0, x1, step = x.indices(self.w)
+            if step != 1:
+                raise IndexError('slices with a step are not supported')
+            self.set_range(y, x0, x1, value)
+        else:
+            self.set(y, int(x), value)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self._unpack_rows(0, self.h)
+        if dtype is not None:
+            array = array.astype(dtype)
+        return array
+
+    def __eq__(self, other):
+        if isinstance(other, BorderGrid):
+            return self.shape == other.shape and self.rows == other.rows
+        return NotImplemented
+
+    def __repr__(self):
+        return str(np.asarray(self))
@@ -0,0 +1,78 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+class RenderCache:
+    def __init__(self):
+        '''
+        Create a cache of rendered rows. Keep one cache per sheet and pass it
+        to Table.to_latex every time the sheet is converted: only the rows
+        that changed since the previous conversion are rendered again.
+
+        Rows are stored under the key returned by Table.row_key. Only the rows
+        used in the last conversion are kept, so the size of the cache is
+        bounded by the size of the sheet.
+        '''
+
+        self.context = None
+        self.rows = {}
+        self.hits = 0
+        self.misses = 0
+
+        self._current = {}
+
+    def start(self, context):
+        '''
+        Start a new conversion. <context> holds the column defaults the rows
+        depend on (default borders and alignments, width of the table...). If
+        it differs from the one of the previous conversion the cache is
+        emptied.
+        '''
+
+        if context != self.context:
+            self.rows = {}
+            self.context = context
+
+        self._current = {}
+
+    def get(self, key):
+        row = self.rows.get(key)
+
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._current[key] = row
+
+        return row
+
+    def put(self, key, row):
+        self._current[key] = row
+
+    def finish(self):
+        '''
+        End the conversion, dropping the rows that were not used in it.
+        '''
+
+        self.rows = self._current
+        self._current = {}
+
+    def clear(self):
+        self.context = None
+        self.rows = {}
+        self._current = {}
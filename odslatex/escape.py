@@ -0,0 +1,86 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+from functools import lru_cache
+
+# Translation table used to escape the characters that have a special meaning
+# in LaTeX. It is built only once, so escaping a string is a single call to
+# str.translate.
+LATEX_SPECIAL_CHARS = str.maketrans({
+        '\\' : '\\textbackslash{}',
+        '&'  : '\\&',
+        '%'  : '\\%',
+        '$'  : '\\$',
+        '#'  : '\\#',
+        '_'  : '\\_',
+        '{'  : '\\{',
+        '}'  : '\\}',
+        '~'  : '\\textasciitilde{}',
+        '^'  : '\\textasciicircum{}',
+        })
+
+# Cells whose text starts with this marker contain LaTeX code written by the
+# user. They are inserted in the output as they are, without the marker. Any
+# other text is escaped, even if it looks like LaTeX: "$5 or $10" is a price,
+# not a formula.
+RAW_LATEX_MARKER = 'latex:'
+
+def escape_latex(text):
+    '''
+    Escape the characters of <text> that have a special meaning in LaTeX.
+    '''
+
+    return text.translate(LATEX_SPECIAL_CHARS)
+
+def is_raw_latex(text):
+    '''
+    Return True if <text> was marked by the user as LaTeX code (see
+    RAW_LATEX_MARKER), and therefore should be inserted in the output
+    without escaping.
+    '''
+
+    return text.startswith(RAW_LATEX_MARKER)
+
+def strip_raw_latex(text):
+    '''
+    Return <text> without the RAW_LATEX_MARKER, if it has it. Used by the
+    backends that are not LaTeX, which show the code of the cell as text.
+    '''
+
+    if is_raw_latex(text):
+        return text[len(RAW_LATEX_MARKER):]
+
+    return text
+
+@lru_cache(maxsize=65536)
+def cell_text(text):
+    '''
+    Return the LaTeX code for the text of a cell. Cells marked as raw LaTeX
+    are returned without the marker, the rest are escaped.
+
+    The result is cached, so each distinct string is only processed once.
+    '''
+
+    if not text:
+        return ''
+
+    if is_raw_latex(text):
+        return strip_raw_latex(text)
+
+    return escape_latex(text)
@@ -0,0 +1,106 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from collections import namedtuple
+from .borders import BorderGrid
+
+# A cell of the layout. (y,x) is its top left corner (the anchor), and (h,w)
+# the number of rows and columns it spans.
+Cell = namedtuple('Cell', ['y', 'x', 'h', 'w', 'text', 'alignment'])
+
+class Layout:
+    def __init__(self, h, w):
+        '''
+        Create an empty layout of a table with <h> rows and <w> columns.
+
+        A layout is the output-independent description of a table shared by
+        all the renderers:
+
+        rows:               for each row, the list of cells anchored in it,
+                            from left to right
+        rules_top:          (h+1, w) BorderGrid, horizontal rule above each cell
+        rules_left:         (h, w+1) BorderGrid, vertical rule left of each cell
+        column_alignments:  most common text alignment of each column
+        column_rules:       default vertical rule left of each column (plus
+                            the right border of the table)
+        alignments:         (h, w) text alignment of each position, or None.
+                            The rows spanned by a \\multirow repeat the cell,
+                            empty, with the alignment of that position
+                            (LibreOffice keeps one for each covered cell).
+                            If None, with the alignment of the cell.
+        table:              the Table the layout was built from, if any
+        '''
+
+        self.h = h
+        self.w = w
+        self.rows = [[] for _ in range(h)]
+        self.rules_top  = BorderGrid(h+1,w)
+        self.rules_left = BorderGrid(h,w+1)
+        self.column_alignments = w*['center']
+        self.column_rules = (w+1)*[False]
+        self.alignments = None
+        self.table = None
+
+    @classmethod
+    def from_table(cls, table):
+        layout = cls(table.h, table.w)
+
+        # The anchors are the cells that own themselves
+        ys, xs = np.indices([table.h, table.w])
+        anchors = (table.owner[:,:,0] == ys) & (table.owner[:,:,1] == xs)
+
+        for y, x in zip(*np.nonzero(anchors)):
+            y, x = int(y), int(x)
+            h, w = table.sizes[y,x].tolist()
+            text = table.data[y][x] or ''
+            layout.rows[y].append(Cell(y, x, h, w, text, str(table.text_alignments[y,x])))
+
+        # The grids are shared with the table, not copied
+        layout.rules_top  = table.borders_top
+        layout.rules_left = table.borders_left
+        layout.column_alignments = table.default_alignments()
+        layout.column_rules = table.default_vertical_borders()
+        layout.alignments = table.text_alignments
+        layout.table = table
+
+        return layout
+
+    def cells(self):
+        '''
+        An iterator over all the cells, from left to right and then from top
+        to bottom.
+        '''
+
+        for row in self.rows:
+            yield from row
+
+    def covered(self):
+        '''
+        Return a (h, w) boolean array, True for the positions covered by a
+        merged cell anchored somewhere else.
+        '''
+
+        covered = np.zeros([self.h, self.w], dtype=bool)
+        for cell in self.cells():
+            if cell.h > 1 or cell.w > 1:
+                covered[cell.y:cell.y+cell.h, cell.x:cell.x+cell.w] = True
+                covered[cell.y, cell.x] = False
+
+        return covered
@@ -18,22 +18,57 @@
 # odslatex. If not, see <https://www.gnu.org/licenses/>.
 
 import argparse
-from zipfile import ZipFile
-from lxml import etree
+from .reader import read_content, list_sheets, open_source, source_name, styles_loader
 import sys
 from .table import Table
+from .beautify import beautify_body, beautify_lines
+from .layout import Layout
+from .renderers import get_renderer, Rendering, RENDERERS
 import copy
+import re
+import os
+import shutil
+import json
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+def parse_size(text):
+    '''
+    Parse a size in bytes, with an optional suffix K, M, G or T (powers of
+    1024), like 512M or 2G.
+    '''
+
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?)\s*([KMGT]?)i?B?\s*', text, re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError('invalid size: {}'.format(text))
+
+    number, unit = match.groups()
+    return int(float(number) * 1024**' KMGT'.index(unit.upper() or ' '))
 
 parser = argparse.ArgumentParser(description = 'odslatex: an open-source program to convert LibreOffice Calc spreadsheets into LaTeX tables.')
-parser.add_argument('-l', '--list', help='List the tables included in the ods document', action='store_true')
+parser.add_argument('-l', '--list', help='List the tables included in the ods document. With --format json, describe each sheet (name, size and used range) in JSON.', action='store_true')
+parser.add_argument('-p', '--pick', help='Choose the sheet to convert from a list, reading the file only once.', action='store_true')
+parser.add_argument('--picker', help='Shell command used by --pick to choose the sheet (for example zenity --list --column=Sheet). It reads one sheet per line and prints the chosen one. Implies --pick.', default=None)
 parser.add_argument('-n', '--which', help='Choose which table from the file you want to convert (0 by default).', default=0)
 #parser.add_argument('--tmp', help='Choose the temporary directory', default='/tmp')
 parser.add_argument('--no-tabular', help='Returns only the table contents, without the tabular environment definitions.', action='store_false', dest='write_tabular_environment')
 parser.add_argument('--minimal-latex', help='Produce a minimal LaTeX document to compile and see the table produced.', action='store_true' )
-parser.add_argument('-o', '--output-file', help='Output to file.', type=argparse.FileType('w'), default=sys.stdout)
+parser.add_argument('-f', '--format', help='Output format: latex (default), booktabs, markdown or html. Several comma-separated formats can be produced from a single read of the file.', default='latex')
+parser.add_argument('-o', '--output-file', help='Output to file. The file is only rewritten if its contents change.', default=None)
+parser.add_argument('-d', '--output-dir', help='Write each converted sheet to its own .tex file in this directory, together with a make-style .d dependency file. Files are only rewritten if their contents change.', default=None)
+parser.add_argument('--no-escape', help='Do not escape the LaTeX special characters in the text of the cells.', action='store_false', dest='escape')
+parser.add_argument('--skip-hidden', help='Do not convert the hidden (collapsed or filtered out) rows and columns of the sheet.', action='store_true')
+parser.add_argument('--stream', help='Parse the spreadsheet while it is being decompressed, on two threads. Uses less memory with very large files.', action='store_true')
+parser.add_argument('--max-cells', help='Refuse to convert sheets with more cells than this.', type=int, default=None)
+parser.add_argument('--max-memory', help='Refuse to convert sheets that would take more memory than this, estimated before reading them. Accepts suffixes K, M, G and T, like 512M.', type=parse_size, default=None)
+parser.add_argument('--decimal-places', help='Rewrite every numeric cell from its value with this number of decimal places.', type=int, default=None)
+parser.add_argument('--preview', help='Instead of converting the table, draw a window of it in the terminal.', action='store_true')
+parser.add_argument('--preview-rows', help='Number of rows drawn from the top and from the bottom of the table with --preview (10 by default).', type=int, default=10)
+parser.add_argument('--preview-columns', help='Range FIRST:LAST of the columns drawn with --preview, LAST excluded (0:8 by default).', default='0:8')
 parser.add_argument('--print-debug-info', help='Print the contents of the parsed table for debugging purposes', action='store_true')
 
-parser.add_argument('filename', help='Filename')
+parser.add_argument('filename', help='Filename, or - to read the document from the standard input')
 
 def list_tables(**kwargs):
     '''
@@ -43,44 +78,136 @@ def list_tables(**kwargs):
     Parameters:
     -----------
 
-    filename: name of the file to read
+    filename: name of the file to read, or its contents (see render_formats)
+    content: the parsed content.xml of the file (see reader.read_content), to
+    avoid reading the file again
+    return_list (bool): return the list of names instead of the text
+    format (str): 'json' to return a JSON array describing each sheet (see
+    reader.list_sheets), with its size and used range
     '''
 
     args = {
             'return_list' : False,
-            'filename'     : ''
+            'filename'    : '',
+            'content'     : None,
+            'stream'      : False,
+            'format'      : None
             }
 
     args.update(kwargs)
 
-    with ZipFile(args['filename'], 'r') as zipobj:
-        xml_content = zipobj.read('content.xml')
-
-    tree = etree.fromstring(xml_content)
+    tree = args['content']
+    if tree is None:
+        tree = read_content(args['filename'], stream=args['stream'])
 
-    ns = {
-            'table'  : 'urn:oasis:names:tc:opendocument:xmlns:table:1.0',
-            'office' : 'urn:oasis:names:tc:opendocument:xmlns:office:1.0',
-            'text'   : 'urn:oasis:names:tc:opendocument:xmlns:text:1.0',
-            'style'  : 'urn:oasis:names:tc:opendocument:xmlns:style:1.0',
-            'fo'     : 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
-            }
-
-    table_names = []
-    for table in tree.iter( etree.QName(ns['table'],'table') ):
-        table_names.append(
-                table.attrib[ etree.QName(ns['table'],'name') ]
-                    )
+    sheets = list_sheets(tree)
+    table_names = [sheet['name'] for sheet in sheets]
 
     if args['return_list']:
         return table_names
 
-    ans = 'List of sheets from {}:\n'.format(args['filename'])
+    if args['format'] == 'json':
+        return json.dumps(sheets, indent=2) + '\n'
+
+    ans = 'List of sheets from {}:\n'.format(source_name(args['filename']))
     for n, name in enumerate(table_names):
         ans += '{:4d}: {:75}\n'.format(n, name)
 
     return ans
 
+def pick_sheet(sheets, command=None):
+    '''
+    Let the user choose one of <sheets> (see reader.list_sheets) and return
+    its index. With a single sheet, it is chosen without asking.
+
+    The sheets are offered one per line, as "N: name (rows x columns)". If
+    <command> is given, it is run by the shell with these lines as its
+    standard input, and must print the chosen line (like zenity --list,
+    fzf or dmenu). Otherwise the list is written to the standard error and
+    the number of the sheet is read from the standard input.
+    '''
+
+    if len(sheets) == 1:
+        return 0
+
+    choices = ''.join('{:d}: {} ({:d} x {:d})\n'.format(
+        sheet['index'], sheet['name'], sheet['rows'], sheet['columns']) for sheet in sheets)
+
+    if command is not None:
+        result = subprocess.run(command, shell=True, input=choices,
+                stdout=subprocess.PIPE, universal_newlines=True)
+        if result.returncode != 0:
+            raise Exception('No sheet selected.')
+        choice = result.stdout
+    else:
+        sys.stderr.write(choices)
+        sys.stderr.write('Sheet number: ')
+        sys.stderr.flush()
+        choice = sys.stdin.readline()
+
+    match = re.match(r'\s*(\d+)', choice)
+    if match is None or int(match.group(1)) >= len(sheets):
+        raise Exception('No sheet selected.')
+
+    return int(match.group(1))
+
+# LaTeX packages of the minimal documents, and the commands that need them
+LATEX_PACKAGES = [
+        ('booktabs', ['\\toprule', '\\midrule', '\\bottomrule', '\\cmidrule']),
+        ('multirow', ['multirow'])
+        ]
+
+def table_packages(table):
+    '''
+    Return the LaTeX packages needed by <table>, a Rendering or a text. The
+    packages of a Rendering were found while rendering it; a text is
+    searched for the commands that need them.
+    '''
+
+    if isinstance(table, Rendering):
+        return table.packages
+
+    return {package for package, commands in LATEX_PACKAGES
+            if any(command in table for command in commands)}
+
+def table_chunks(table):
+    '''
+    Return the text of <table>, a Rendering or a text, as a list of strings.
+    '''
+
+    if isinstance(table, Rendering):
+        return table.chunks
+
+    return [table]
+
+def latex_document_chunks(tables):
+    '''
+    Generate the text of the LaTeX document of latex_document, piece by
+    piece, without joining the texts of the tables.
+    '''
+
+    if not isinstance(tables, list):
+        tables = [tables]
+
+    packages = set()
+    for table in tables:
+        packages |= table_packages(table)
+
+    yield '\\documentclass{article}\n'
+
+    for package, _ in LATEX_PACKAGES:
+        if package in packages:
+            yield '\\usepackage{{{}}}\n'.format(package)
+
+    yield '\n'
+    yield '\\begin{document}\n'
+
+    for table in tables:
+        yield from table_chunks(table)
+        yield '\\newpage'
+
+    yield '\\end{document}\n'
+
 def latex_document(tables):
     '''
     Produce a LaTeX document from a list of tables
@@ -88,30 +215,116 @@ def latex_document(tables):
     Parameters:
     -----------
 
-    tables: a list of tables generated with the convert_table function.
+    tables: a list of tables generated with the render_formats function
+    (Renderings), or their texts as generated with the convert_table
+    function.
     '''
 
-    text  = '\\documentclass{article}\n'
+    return ''.join(latex_document_chunks(tables))
 
-    if not isinstance(tables, list):
-        tables_list = [tables]
-    else:
-        tables_list = tables
+def read_table(args):
+    '''
+    Read the table <which> of the file <filename>, or of the already parsed
+    <content> if it is not None. <args> are the parameters of
+    render_formats.
+    '''
+
+    options = {
+            'sheet'            : int(args['which']),
+            'print_debug_info' : args.get('print_debug_info', False),
+            'skip_hidden'      : args.get('skip_hidden', False),
+            'max_cells'        : args.get('max_cells'),
+            'max_memory'       : args.get('max_memory')
+            }
+
+    if args.get('content') is not None:
+        return Table.from_content(args['content'], filename=source_name(args['filename']),
+                styles=args.get('styles'), **options)
+
+    return Table.from_ods(args['filename'], stream=args.get('stream', False), **options)
+
+def render_formats(**kwargs):
+    '''
+    Render a table read from the .ods file <filename> into several formats.
+    The file is read only once, and all the formats are rendered from the same
+    layout. Return a dictionary with the Rendering of the table in each format
+    (see renderers.Rendering): its text in chunks, and the LaTeX packages it
+    needs, its size and the time taken to render it.
+
+    Parameters:
+    -----------
 
-    for table_text in tables_list:
-        if 'multirow' in table_text:
-            text += '\\usepackage{multirow}\n'
-            break
+    filename (str): name of the .ods file. Its contents (bytes, bytearray,
+    memoryview...) or a binary file object are accepted too, and read in
+    memory without a temporary file
+    which (int): which table to convert
+    formats (list or str): output formats (see renderers.RENDERERS), as a 
+    list or comma-separated
+    escape (bool): escape the special characters in the cells
+    skip_hidden (bool): drop the hidden rows and columns of the sheet
+    stream (bool): parse the file while it is being decompressed
+    max_cells (int): refuse to read sheets with more cells than this
+    max_memory (int): refuse to read sheets whose table would take more bytes
+    than this (see Table.estimate_memory)
+    content: the parsed content.xml of the file (see reader.read_content), to
+    convert several sheets reading the file only once
+    styles: with content, the parsed styles.xml of the file or a function
+    returning it (see reader.styles_loader). The common styles are ignored if
+    it is None
+    decimal_places (int): if not None, format all the numeric cells with this
+    number of decimal places
+    cache (RenderCache): reuse the rows rendered in previous conversions of
+    the same sheet (LaTeX format only)
+    '''
+
+    args = {
+            'filename'                  : '',
+            'which'                     : 0,
+            'formats'                   : ['latex'],
+            'print_debug_info'          : False,
+            'write_tabular_environment' : True,
+            'escape'                    : True,
+            'skip_hidden'               : False,
+            'stream'                    : False,
+            'max_cells'                 : None,
+            'max_memory'                : None,
+            'content'                   : None,
+            'styles'                    : None,
+            'decimal_places'            : None,
+            'cache'                     : None
+            }
+
+    args.update(kwargs)
 
-    text += '\n'
-    text += '\\begin{document}\n'
+    formats = args['formats']
+    if isinstance(formats, str):
+        formats = formats.split(',')
 
-    for table_text in tables_list:
-        text += table_text + '\\newpage'
+    table = read_table(args)
 
-    text += '\\end{document}\n'
+    if args['decimal_places'] is not None:
+        table.format_numbers(decimal_places=args['decimal_places'])
 
-    return text
+    layout = Layout.from_table(table)
+
+    results = {}
+    for name in formats:
+        renderer = get_renderer(name, escape=args['escape'], cache=args['cache'],
+                write_tabular_environment=args['write_tabular_environment'])
+        results[name] = renderer.render_result(layout)
+
+    return results
+
+def convert_formats(**kwargs):
+    '''
+    Convert a table read from the .ods file <filename> into several formats.
+    The file is read only once, and all the formats are rendered from the same
+    layout. Return a dictionary with the text of the table in each format.
+
+    The parameters are those of render_formats.
+    '''
+
+    return {name : result.text for name, result in render_formats(**kwargs).items()}
 
 def convert_table(**kwargs):
     '''
@@ -121,135 +334,316 @@ def convert_table(**kwargs):
     Parameters:
     -----------
 
-    filename (str): name of the .ods file
+    filename (str): name of the .ods file, or its contents (see
+    convert_formats)
     which (int): which table to convert
+    format (str): output format, latex by default (see render_formats)
+
+    The rest of the parameters are those of render_formats.
     '''
 
     args = {
-            'filename'                  : '',
-            'which'                     : 0,
-            'print_debug_info'          : False,
-            'write_tabular_environment' : True
+            'format' : 'latex'
             }
 
     args.update(kwargs)
+    args['formats'] = [args['format']]
 
-    table = Table.from_ods(args['filename'],sheet=int(args['which']),print_debug_info=args['print_debug_info'])
-    header, body, epilog = table.to_latex()
-    body = beautify_body(body)
+    return convert_formats(**args)[args['format']]
 
-    if args['write_tabular_environment']:
-        table_text = ''.join([header, body, epilog])
-    else:
-        table_text = body
+# The result of converting one of the sources of convert_many: the texts of
+# the table in each format, or the exception raised while converting it
+Conversion = namedtuple('Conversion', ['source', 'texts', 'error'])
+
+def convert_one(source, args):
+    try:
+        return Conversion(source, convert_formats(**dict(args, filename=source)), None)
+    except Exception as e:
+        return Conversion(source, None, e)
+
+def convert_many(sources, max_workers=None, **kwargs):
+    '''
+    Convert a table of each of the .ods files in <sources> concurrently, on
+    a pool of <max_workers> threads (see concurrent.futures). Each source is
+    a file name, its contents or a binary file object (see convert_formats),
+    and is read by a single thread, so the same file object must not be
+    given twice. lxml releases the GIL while it parses, so the files are
+    parsed in parallel. Nothing is shared between the conversions, and this
+    function can be called from several threads at once.
+
+    Return a list of Conversions (source, texts, error), in the order of
+    <sources>. texts is the dictionary returned by convert_formats, or None
+    if the conversion failed; then error is the exception raised, and the
+    other sources are still converted.
+
+    The rest of the parameters are those of convert_formats, except cache,
+    and apply to all the sources.
+    '''
+
+    if 'filename' in kwargs or 'content' in kwargs:
+        raise Exception('The files converted by convert_many are given as <sources>.')
+    if kwargs.get('cache') is not None:
+        raise Exception('A RenderCache can not be shared by the conversions of convert_many.')
+
+    sources = list(sources)
+    if not sources:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='odslatex') as executor:
+        futures = [executor.submit(convert_one, source, kwargs) for source in sources]
+        return [future.result() for future in futures]
+
+def preview_table(**kwargs):
+    '''
+    Return an ASCII drawing of a window of a table read from the .ods file
+    <filename> (see Table.preview).
+
+    Parameters:
+    -----------
+
+    filename (str): name of the .ods file, or its contents (see
+    convert_formats)
+    which (int): which table to draw
+    preview_rows (int): number of rows drawn from the top and from the bottom
+    preview_columns (str): range of columns drawn, as 'FIRST:LAST'
+    content: the parsed content.xml of the file (see render_formats)
+    styles: its styles.xml (see render_formats)
+    '''
+
+    args = {
+            'filename'        : '',
+            'which'           : 0,
+            'preview_rows'    : 10,
+            'preview_columns' : '0:8',
+            'content'         : None,
+            'styles'          : None
+            }
+
+    args.update(kwargs)
+
+    first, last = args['preview_columns'].split(':')
+
+    table = read_table(args)
+    return table.preview(head=args['preview_rows'], tail=args['preview_rows'],
+            columns=(int(first or 0), int(last) if last else table.w))
+
+def write_if_changed(filename, text):
+    '''
+    Write <text> to <filename>, unless the file already has exactly that 
+    content. The file is replaced atomically, so readers never see a partially
+    written file. Return True if the file was written.
+    '''
+
+    data = text.encode('utf-8')
+
+    exists = True
+    try:
+        with open(filename, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        exists = False
+
+    # The temporary file is created in the same directory, so that it can be
+    # renamed over the original one. Unlike tempfile.mkstemp, os.open honours
+    # the umask for the permissions of the new file.
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    tmpname = os.path.join(dirname, '.{}.{}.tmp'.format(basename, os.urandom(6).hex()))
+    fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # A replaced file keeps its permissions
+        if exists:
+            shutil.copymode(filename, tmpname)
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
+
+    return True
+
+def sheet_filenames(names):
+    '''
+    Return a list with a base filename (without extension) for each sheet name
+    in <names>. Unsafe characters are replaced, and repeated names are
+    numbered.
+    '''
+
+    filenames = []
+    used = set()
+
+    for name in names:
+        base = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('.') or 'sheet'
+
+        filename = base
+        n = 1
+        while filename in used:
+            filename = '{}_{:d}'.format(base, n)
+            n += 1
+
+        used.add(filename)
+        filenames.append(filename)
+
+    return filenames
+
+def format_extensions(formats):
+    '''
+    Return a dictionary with the extension of the files written for each
+    format. If several formats share an extension, the name of the format is
+    added to it (like .booktabs.tex).
+    '''
+
+    extensions = {}
+    used = set()
+
+    for name in formats:
+        extension = get_renderer(name).extension
+        if extension in used:
+            extension = '.' + name + extension
+
+        used.add(extension)
+        extensions[name] = extension
+
+    return extensions
+
+def join_tables_chunks(name, tables, minimal_latex=False):
+    '''
+    Generate the text of join_tables piece by piece, without joining the
+    texts of the tables.
+    '''
+
+    if RENDERERS[name].latex:
+        if minimal_latex:
+            yield from latex_document_chunks(tables)
+            return
+
+        for table in tables:
+            yield from table_chunks(table)
+            yield '\\newpage'
+        return
+
+    for n, table in enumerate(tables):
+        if n:
+            yield '\n'
+        yield from table_chunks(table)
+
+def join_tables(name, tables, minimal_latex=False):
+    '''
+    Join the texts of several tables in the format <name> (Renderings or
+    texts) into a single text. LaTeX tables are separated by page breaks, or
+    put in a minimal LaTeX document.
+    '''
+
+    return ''.join(join_tables_chunks(name, tables, minimal_latex))
 
-    return table_text
+def make_dependencies(targets, prerequisites):
+    '''
+    Return a make rule stating that all the <targets> depend on all the
+    <prerequisites>.
+    '''
+
+    def escape(path):
+        return path.replace('$', '$$').replace(' ', '\\ ').replace('#', '\\#')
 
-def beautify_body(body):
-    import re 
+    return '{}: {}\n'.format(
+            ' '.join(map(escape, targets)), 
+            ' '.join(map(escape, prerequisites)))
 
-    lines = body.split('\n')
-    data = [list(map(lambda x: x.strip(), line.split('&'))) for line in lines]
+def write_sheets(**kwargs):
+    '''
+    Convert the sheets of the .ods file <filename> and write each of them to
+    its own file in <output_dir>, one for each output format. A make-style dependency file, named
+    after the .ods file, is written to the same directory. Files whose content
+    did not change are left untouched. Return the list of files written.
 
-    # Maximum number of columns (there should be at least one line without 
-    # merged columns)
-    maxcols = max(list(map(len, data)))
+    Parameters:
+    -----------
 
-    lines_dict = {
-            'merged' : [],
-            'full'   : [],
-            'single' : []
+    filename (str): name of the .ods file, or its contents (see
+    convert_formats). The dependency file is only written for named files.
+    output_dir (str): directory where the files are written
+    which (int or 'all'): which sheet to convert
+    format (str): comma-separated output formats
+    minimal_latex (bool): write a minimal LaTeX document for each sheet
+
+    The rest of the parameters are passed to render_formats.
+    '''
+
+    args = {
+            'filename'      : '',
+            'output_dir'    : '.',
+            'which'         : 'all',
+            'format'        : 'latex',
+            'minimal_latex' : False
             }
 
-    kind_list = []
-
-    # Separate lines according to the number of columns they have
-    for elem in data:
-        if any(map(lambda x: 'multicolumn' in x, elem)) and len(elem) < maxcols:
-            lines_dict['merged'].append(elem)
-            kind_list.append('merged')
-        elif len(elem) == maxcols:
-            lines_dict['full'].append(elem)
-            kind_list.append('full')
-        elif len(elem) == 1:
-            lines_dict['single'].append(elem)
-            kind_list.append('single')
+    args.update(kwargs)
+
+    formats = args['format'].split(',')
+    extensions = format_extensions(formats)
+
+    # Read the file only once for all the sheets
+    if args.get('content') is None:
+        args['filename'] = open_source(args['filename'])
+        args['content'] = read_content(args['filename'], stream=args.get('stream', False))
+        args['styles'] = styles_loader(args['filename'])
+
+    names = list_tables(filename=args['filename'], content=args['content'], return_list=True)
+    basenames = [os.path.join(args['output_dir'], name) for name in sheet_filenames(names)]
+
+    if args['which'] == 'all':
+        sheets = list(range(len(names)))
+    else:
+        sheets = [int(args['which'])]
+
+    os.makedirs(args['output_dir'], exist_ok=True)
+
+    written = []
+    targets = []
+    for n in sheets:
+        results = render_formats(**dict(args, which=n, formats=formats))
+
+        for name, result in results.items():
+            if args['minimal_latex'] and RENDERERS[name].latex:
+                table_text = latex_document(result)
+            else:
+                table_text = result.text
+
+            filename = basenames[n] + extensions[name]
+            targets.append(filename)
+
+            if write_if_changed(filename, table_text):
+                written.append(filename)
+
+    if isinstance(args['filename'], (str, os.PathLike)):
+        filename = os.fspath(args['filename'])
+        depfile = os.path.splitext(os.path.basename(filename))[0] + '.d'
+        depfile = os.path.join(args['output_dir'], depfile)
+        rule = make_dependencies(targets, [filename])
+
+        if write_if_changed(depfile, rule):
+            written.append(depfile)
+
+    return written
+
+def write_output(output_file, text):
+    '''
+    Write <text> to the file <output_file>, or to the standard output if it is
+    None. <text> can also be an iterable of strings, which are written to the
+    standard output as they come.
+    '''
+
+    if output_file is None:
+        if isinstance(text, str):
+            sys.stdout.write(text)
         else:
-            raise Exception('Something''s wrong with line ', elem)
-
-    # Now determine the maximum length of each column in the full lines (i.e.),
-    # lines that contain the maximum number of columns (because they don't 
-    # have multicolumn environments)
-    lens = []
-    for elem in lines_dict['full']:
-        lens.append(list(map(len, elem)))
-
-    lens2 = list(map(list, zip(*lens)))
-
-    # Determine the maximum length of each column (only full columns)
-    maxlens = list(map(max, lens2))
-
-    # Now see if the compacted columns can be fit into those lengths. If not,
-    # update them. We make the rightmost element grow until it fits.
-    merged_fmt_strs = []
-    ncols_list = []
-
-    for elem in lines_dict['merged']:
-
-        x = 0
-        curr_ncols_list = []
-        for n, cell in enumerate(elem):
-            m = re.search(r'\\multicolumn\{(.*?)\}', cell)
-            ncols = 1
-            if m:
-                ncols = int(m.group(1))
-
-            curr_ncols_list.append(ncols)
-
-            maxlen = sum(maxlens[x:x+ncols])
-            dif = len(cell) - maxlen
-            if dif > 0:
-                maxlens[x+ncols-1] += dif
-
-            x += ncols
-
-        ncols_list.append(curr_ncols_list)
-
-    # With the updated maximum lengths on each column, prepare a list with the
-    # format strings for the lines with merged columns
-    for n, elem in enumerate(lines_dict['merged']):
-        curr_fmt_str = ''
-        x = 0
-        for m, cell in enumerate(elem):
-            ncols = ncols_list[n][m]
-            maxlen = sum(maxlens[x:x+ncols]) + (ncols-1)*3 # Add space for ' & '
-
-            curr_fmt_str += '{{:{}{:d}}}'.format('^' if ncols > 1 else '', max(maxlen, len(cell)))
-
-            if m != len(elem)-1:
-                curr_fmt_str += ' & '
-
-            x += ncols
-
-        merged_fmt_strs.append(curr_fmt_str)
-
-    fmt_str = ''
-    for n, l in enumerate(maxlens):
-        fmt_str += '{{:{:d}}}'.format(l)
-        if n != len(maxlens)-1:
-            fmt_str += ' & '
-    
-    body = ''
-    for kind in kind_list:
-        elem = lines_dict[kind].pop(0)
-        if kind == 'full':
-            body += fmt_str.format(*elem) + '\n'
-        elif kind == 'single':
-            body += elem[0] + '\n'
-        elif kind == 'merged':
-            body += merged_fmt_strs.pop(0).format(*elem) + '\n'
-
-    return body
+            for chunk in text:
+                sys.stdout.write(chunk)
+    else:
+        if not isinstance(text, str):
+            text = ''.join(text)
+        write_if_changed(output_file, text)
 
 def main():
     args0 = parser.parse_args()
@@ -260,32 +654,66 @@ def main():
         raise Exception('You can either ask for a minimal LaTeX document or ' +
                 'for only the table contents. Not for both.')
 
+    if args.output_file is not None and args.output_dir is not None:
+        raise Exception('You can either write the output to a file or to a ' +
+                'directory. Not to both.')
+
+    if args.filename == '-':
+        args.filename = sys.stdin.buffer
+
+    # The file is read only once, whatever is done with it
+    args.filename = open_source(args.filename)
+    args.content = read_content(args.filename, stream=args.stream)
+    args.styles = styles_loader(args.filename)
+
+    if (args.pick or args.picker is not None) and not args.list:
+        args.which = pick_sheet(list_sheets(args.content), args.picker)
+
     if args.list:
-        args.output_file.write(list_tables(args))
-    else:
+        write_output(args.output_file, list_tables(**vars(args)))
+    elif args.preview:
         if args.which == 'all':
-            curr_args = vars(args).copy()
-            curr_args['return_count'] = True
-            ntables = int(list_tables(**curr_args))
+            ntables = len(list_sheets(args.content))
+            sheets = range(ntables)
+        else:
+            sheets = [int(args.which)]
 
-            tables_list = []
-            for n in range(ntables):
-                args.which = n
-                tables_list.append(convert_table(**args.to_dict()))
+        write_output(args.output_file, '\n'.join(
+            preview_table(**dict(vars(args), which=n)) for n in sheets))
+    elif args.output_dir is not None:
+        write_sheets(**vars(args))
+    else:
+        formats = args.format.split(',')
 
-            if args.minimal_latex:
-                args.output_file.write(latex_document(tables_list))
-            else:
-                for table_text in tables_list:
-                    args.output_file.write(table_text + '\\newpage') 
+        # With several formats, each one goes to its own file, named after
+        # the output file
+        output_files = {name : args.output_file for name in formats}
+        if args.output_file is not None and len(formats) > 1:
+            base = os.path.splitext(args.output_file)[0]
+            for name, extension in format_extensions(formats).items():
+                output_files[name] = base + extension
 
+        if args.which == 'all':
+            ntables = len(list_sheets(args.content))
+            sheets = list(range(ntables))
         else:
-            n = int(args.which)
-
-            if args.minimal_latex:
-                args.output_file.write(latex_document(**vars(args)))
+            sheets = [int(args.which)]
+
+        tables = {name : [] for name in formats}
+        for n in sheets:
+            results = render_formats(**dict(vars(args), which=n, formats=formats))
+            for name, result in results.items():
+                tables[name].append(result)
+
+        for name in formats:
+            if args.which == 'all':
+                chunks = join_tables_chunks(name, tables[name], args.minimal_latex)
+            elif args.minimal_latex and RENDERERS[name].latex:
+                chunks = latex_document_chunks(tables[name])
             else:
-                args.output_file.write(convert_table(**vars(args)))
+                chunks = tables[name][0].chunks
+
+            write_output(output_files[name], chunks)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from functools import lru_cache
+from lxml import etree
+
+ns = {
+        'number' : 'urn:oasis:names:tc:opendocument:xmlns:datastyle:1.0',
+        'style'  : 'urn:oasis:names:tc:opendocument:xmlns:style:1.0',
+        }
+
+# Value types of the cells that carry a number in office:value
+NUMERIC_VALUE_TYPES = ('float', 'percentage', 'currency')
+
+class NumberFormatter:
+    def __init__(self, decimal_places, min_integer_digits=1, grouping=False,
+            percentage=False):
+        '''
+        A function that converts an array of numbers into a list of strings
+        with the given format (see number_formatter).
+        '''
+
+        self.args = (decimal_places, min_integer_digits, grouping, percentage)
+
+        width = min_integer_digits
+        if decimal_places > 0:
+            width += decimal_places + 1
+
+        suffix = '%' if percentage else ''
+
+        self.percentage = percentage
+        self.grouping = grouping
+
+        if grouping:
+            self.fmt = ('{{:0{:d},.{:d}f}}'.format(width, decimal_places) + suffix).format
+        else:
+            # Escape the percent sign for the %-style format string
+            self.fmt = '%0{:d}.{:d}f'.format(width, decimal_places) + 2*suffix
+
+    def __call__(self, values):
+        values = np.asarray(values, dtype=float)
+        if self.percentage:
+            values = 100*values
+
+        # The zeros pad the integer part, so the absolute values are formatted
+        # and the sign is added afterwards
+        negative = np.signbit(values)
+        values = np.abs(values)
+
+        if self.grouping:
+            texts = list(map(self.fmt, values.tolist()))
+        else:
+            texts = np.char.mod(self.fmt, values).tolist()
+
+        if negative.any():
+            texts = ['-' + text if sign else text
+                    for text, sign in zip(texts, negative.tolist())]
+
+        return texts
+
+    def __reduce__(self):
+        # Unpickled formatters come from the cache of the receiving process
+        return (number_formatter, self.args)
+
+@lru_cache(maxsize=None)
+def number_formatter(decimal_places, min_integer_digits=1, grouping=False,
+        percentage=False):
+    '''
+    Return a function that converts an array of numbers into a list of
+    strings with the given format. Formatters are cached, so every distinct
+    format is only compiled once.
+
+    Parameters:
+    -----------
+
+    decimal_places (int): number of digits after the decimal point
+    min_integer_digits (int): pad the integer part with zeros to this length
+    grouping (bool): separate the thousands with commas
+    percentage (bool): multiply by 100 and add a percent sign
+    '''
+
+    return NumberFormatter(decimal_places, min_integer_digits, grouping, percentage)
+
+def compile_number_style(element):
+    '''
+    Compile a <number:number-style> or <number:percentage-style> element into
+    a formatter (see number_formatter). Return None if the style does not fix
+    the number of decimal places, in which case the text displayed by the
+    spreadsheet should be kept.
+    '''
+
+    number = element.find(etree.QName(ns['number'],'number'))
+    if number is None:
+        return None
+
+    key = etree.QName(ns['number'],'decimal-places')
+    if key not in number.attrib:
+        return None
+
+    decimal_places = int(number.attrib[key])
+
+    key = etree.QName(ns['number'],'min-integer-digits')
+    min_integer_digits = int(number.attrib.get(key, 1))
+
+    key = etree.QName(ns['number'],'grouping')
+    grouping = number.attrib.get(key, 'false') == 'true'
+
+    percentage = element.tag == etree.QName(ns['number'],'percentage-style')
+
+    return number_formatter(decimal_places, min_integer_digits, grouping,
+            percentage)
+
+def read_number_styles(tree):
+    '''
+    Compile all the number styles defined in <tree>. Return a dictionary
+    mapping each data style name to its formatter.
+    '''
+
+    formatters = {}
+
+    for tag in ['number-style', 'percentage-style']:
+        for element in tree.iter(etree.QName(ns['number'],tag)):
+            name = element.attrib[etree.QName(ns['style'],'name')]
+            formatter = compile_number_style(element)
+            if formatter is not None:
+                formatters[name] = formatter
+
+    return formatters
@@ -0,0 +1,308 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import errno
+import io
+import os
+import queue
+import threading
+from lxml import etree
+from zipfile import ZipFile
+
+TABLE_NS  = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS   = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+
+# Size of the chunks inflated from the zip file and fed to the parser
+CHUNK_SIZE = 1 << 18
+
+# Maximum number of inflated chunks waiting to be parsed
+QUEUE_CHUNKS = 16
+
+class BufferReader(io.RawIOBase):
+    def __init__(self, buffer, name=None):
+        '''
+        A read-only, seekable binary file over <buffer> (bytes, bytearray,
+        memoryview or any other object with the buffer protocol). Unlike
+        io.BytesIO, the buffer is not copied: only the parts that are read.
+        <name> is the name of the file the buffer was read from, if any.
+        '''
+
+        self.buffer = memoryview(buffer).cast('B')
+        self.pos = 0
+        if name is not None:
+            self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        end = len(self.buffer) if size is None or size < 0 else self.pos + size
+        data = bytes(self.buffer[self.pos:end])
+        self.pos += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+
+        if offset < 0:
+            # Like a real file, so that ZipFile reports a bad zip file
+            raise OSError(errno.EINVAL, 'Invalid argument')
+
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+def open_source(source):
+    '''
+    Return an object that ZipFile can read an .ods file from. <source> is
+    the name of the file, its contents (bytes, bytearray, memoryview...) or
+    a binary file object. Contents are read in place, without copying them,
+    and file objects that can not seek (like pipes) are read completely
+    first. The object returned can be read any number of times.
+    '''
+
+    if isinstance(source, (str, os.PathLike)):
+        return source
+
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seekable') and source.seekable():
+            return source
+        return BufferReader(source.read(), getattr(source, 'name', None))
+
+    return BufferReader(source)
+
+def source_name(source):
+    '''
+    Return a name for <source> (see open_source) for the messages: the name
+    of the file, or a description of the object.
+    '''
+
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+
+    name = getattr(source, 'name', None)
+    if isinstance(name, str):
+        return name
+
+    return '<{}>'.format(type(source).__name__)
+
+def read_content(filename, member='content.xml', stream=False):
+    '''
+    Parse the XML file <member> of the .ods file <filename>, and return its
+    root element. <filename> can also be the contents of the file or a file
+    object (see open_source).
+
+    By default the file is inflated completely and then parsed. If <stream>
+    is True it is parsed while it is being inflated instead: a thread reads
+    the file from the zip in chunks, and the calling thread feeds them to an
+    lxml feed parser as they arrive. Inflating and parsing overlap, and the
+    uncompressed file is never held in memory as a whole, which matters for
+    very large workbooks. Errors raised while reading the file are raised
+    again in the calling thread.
+    '''
+
+    with ZipFile(open_source(filename), 'r') as zipobj:
+        if not stream:
+            return etree.fromstring(zipobj.read(member))
+
+        with zipobj.open(member) as f:
+            return _parse_pipelined(f)
+
+def read_styles(filename):
+    '''
+    Parse the styles.xml file of the .ods file <filename> (see
+    read_content), which holds the common styles of the document. Return
+    None if the file has no styles.xml.
+    '''
+
+    try:
+        return read_content(filename, member='styles.xml')
+    except KeyError:
+        return None
+
+def styles_loader(filename):
+    '''
+    Return a function that parses the styles.xml of <filename> (see
+    read_styles) the first time it is called, and returns the same tree
+    afterwards. <filename> must be readable more than once: pass the object
+    returned by open_source for file objects.
+    '''
+
+    lock = threading.Lock()
+    tree = []
+
+    def load():
+        with lock:
+            if not tree:
+                tree.append(read_styles(filename))
+            return tree[0]
+
+    return load
+
+def _parse_pipelined(stream):
+    chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+    stop = threading.Event()
+
+    def put(item):
+        # Give up if the parser stopped, instead of blocking on a full queue
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def inflate():
+        try:
+            while not stop.is_set():
+                chunk = stream.read(CHUNK_SIZE)
+                put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=inflate, name='odslatex-inflate', daemon=True)
+    thread.start()
+
+    parser = etree.XMLParser()
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                break
+            parser.feed(chunk)
+
+        return parser.close()
+    finally:
+        stop.set()
+        thread.join()
+
+def column_name(x):
+    '''
+    Return the name of column <x> (counted from 0) in a spreadsheet: A, B,
+    ..., Z, AA, AB...
+    '''
+
+    name = ''
+    x += 1
+    while x:
+        x, rest = divmod(x-1, 26)
+        name = chr(ord('A') + rest) + name
+
+    return name
+
+def list_sheets(tree):
+    '''
+    Return a list with the description of each sheet of <tree>, the root
+    element of a content.xml file. Each sheet is described by a dictionary:
+
+    index (int):        position of the sheet in the file
+    name (str):         name of the sheet
+    rows (int):         number of rows of the table read from it
+    columns (int):      number of columns of the table read from it
+    used_range (dict):  the smallest range containing all the non-empty
+                        cells, with keys first_row, last_row, first_column,
+                        last_column (counted from 0) and cells (like A1:D12).
+                        None for an empty sheet.
+    '''
+
+    table_tag   = etree.QName(TABLE_NS, 'table')
+    row_tag     = etree.QName(TABLE_NS, 'table-row')
+    column_tag  = etree.QName(TABLE_NS, 'table-column')
+    cell_tag    = etree.QName(TABLE_NS, 'table-cell')
+    covered_tag = etree.QName(TABLE_NS, 'covered-table-cell')
+    p_tag       = etree.QName(TEXT_NS, 'p')
+
+    name_key       = etree.QName(TABLE_NS, 'name')
+    rows_key       = etree.QName(TABLE_NS, 'number-rows-repeated')
+    columns_key    = etree.QName(TABLE_NS, 'number-columns-repeated')
+    rows_span_key  = etree.QName(TABLE_NS, 'number-rows-spanned')
+    cols_span_key  = etree.QName(TABLE_NS, 'number-columns-spanned')
+    value_type_key = etree.QName(OFFICE_NS, 'value-type')
+
+    sheets = []
+    for index, table in enumerate(tree.iter(table_tag)):
+        ncols = sum(int(col.get(columns_key, 1)) for col in table.iter(column_tag))
+
+        nrows = 0
+        used = None
+        for row in table.iter(row_tag):
+            nrep_row = int(row.get(rows_key, 1))
+
+            x = 0
+            for cell in row:
+                if cell.tag != cell_tag and cell.tag != covered_tag:
+                    continue
+
+                nrep = int(cell.get(columns_key, 1))
+
+                if cell.tag == cell_tag and (value_type_key in cell.attrib
+                        or cell.find(p_tag) is not None):
+                    last_row = nrows + nrep_row + int(cell.get(rows_span_key, 1)) - 2
+                    last_col = x + nrep + int(cell.get(cols_span_key, 1)) - 2
+
+                    if used is None:
+                        used = [nrows, last_row, x, last_col]
+                    else:
+                        used = [min(used[0], nrows), max(used[1], last_row),
+                                min(used[2], x), max(used[3], last_col)]
+
+                x += nrep
+
+            nrows += nrep_row
+
+        used_range = None
+        if used is not None:
+            first_row, last_row, first_column, last_column = used
+            used_range = {
+                    'first_row'    : first_row,
+                    'last_row'     : last_row,
+                    'first_column' : first_column,
+                    'last_column'  : last_column,
+                    'cells'        : '{}{:d}:{}{:d}'.format(
+                        column_name(first_column), first_row+1,
+                        column_name(last_column), last_row+1)
+                    }
+
+        sheets.append({
+            'index'      : index,
+            'name'       : table.get(name_key),
+            'rows'       : nrows,
+            'columns'    : ncols,
+            'used_range' : used_range
+            })
+
+    return sheets
@@ -0,0 +1,495 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import html
+import time
+from .escape import cell_text, strip_raw_latex
+from .beautify import beautify_lines
+from .layout import Cell
+
+LATEX_ALIGNMENTS = {
+        'start'  : 'l',
+        'center' : 'c',
+        'end'    : 'r'
+        }
+
+MARKDOWN_ALIGNMENTS = {
+        'start'  : ':--',
+        'center' : ':-:',
+        'end'    : '--:'
+        }
+
+HTML_ALIGNMENTS = {
+        'start'  : 'left',
+        'center' : 'center',
+        'end'    : 'right'
+        }
+
+def rule_runs(rules):
+    '''
+    Return a list of (first, last) ranges of consecutive True values in
+    <rules>, with the columns numbered from 1 as in \\cline.
+    '''
+
+    runs = []
+    start = None
+    for x, drawn in enumerate(rules):
+        if drawn and start is None:
+            start = x
+        elif not drawn and start is not None:
+            runs.append((start+1, x))
+            start = None
+
+    if start is not None:
+        runs.append((start+1, len(rules)))
+
+    return runs
+
+def latex_cell(x, h, w, text, alignment, rules_left, column_rules, column_alignments):
+    '''
+    Return the LaTeX code of a cell in column <x> spanning <h> rows and <w>
+    columns, with the given (already escaped) <text> and <alignment>.
+    <rules_left> are the vertical rules of its row, and <column_rules> and
+    <column_alignments> the defaults of the header of the tabular. The last
+    cell of the row includes the line break.
+
+    The alignment string of a \\multicolumn is only needed if the cell
+    spans several columns, or if its rules or alignment differ from the
+    defaults of its column. Rules are only drawn to the right, except in the
+    first column, where they are also drawn to the left.
+    '''
+
+    pre = ''
+    post = ''
+
+    if (x == 0 and rules_left[0] != column_rules[0]) or w > 1 or \
+            rules_left[x+w] != column_rules[x+w] or alignment != column_alignments[x]:
+        alignment = LATEX_ALIGNMENTS.get(alignment, 'r') + ('|' if rules_left[x+w] else '')
+        if x == 0 and rules_left[0]:
+            alignment = '|' + alignment
+        pre += '\\multicolumn{{{:d}}}{{{}}}{{'.format(w, alignment)
+        post += '}'
+
+    if h > 1:
+        pre += '\\multirow{{{:d}}}{{*}}{{'.format(h)
+        post += '}'
+
+    if x + w >= len(rules_left) - 1:
+        post += '\\\\'
+
+    return pre + text + post
+
+class Rendering:
+    def __init__(self, name, chunks, packages=(), rows=0, columns=0, seconds=0.0):
+        '''
+        The result of rendering a table in the format <name>:
+
+        chunks:     the text, as a list of strings to be written one after
+                    the other
+        packages:   LaTeX packages the text needs, found while rendering it
+        rows:       number of rows of the table
+        columns:    number of columns of the table
+        seconds:    time taken to render it
+        '''
+
+        self.name = name
+        self.chunks = chunks
+        self.packages = set(packages)
+        self.rows = rows
+        self.columns = columns
+        self.seconds = seconds
+
+    @property
+    def text(self):
+        return ''.join(self.chunks)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return '<Rendering {} of {:d} x {:d} cells>'.format(self.name, self.rows, self.columns)
+
+class Renderer:
+    # Name of the format, as given to --format
+    name = None
+
+    # Extension of the files written in this format
+    extension = None
+
+    # Whether the output is LaTeX code, that can go in a LaTeX document
+    latex = False
+
+    def __init__(self, **kwargs):
+        '''
+        Create a renderer. The options common to all the renderers are:
+
+        escape (bool): escape the special characters in the text of the cells
+        write_tabular_environment (bool): write the whole table, and not only
+                                          its rows
+        '''
+
+        self.options = {
+                'escape'                    : True,
+                'write_tabular_environment' : True
+                }
+
+        self.options.update(kwargs)
+
+    def render(self, layout):
+        '''
+        Return the text of the table described by <layout>.
+        '''
+
+        raise NotImplementedError
+
+    def chunks(self, layout):
+        '''
+        Return the text of the table described by <layout> as a list of
+        strings, so that it can be written out without joining them first.
+        '''
+
+        return [self.render(layout)]
+
+    def packages(self, layout):
+        '''
+        Return the LaTeX packages needed by the text of the table described
+        by <layout>.
+        '''
+
+        return set()
+
+    def render_result(self, layout):
+        '''
+        Render the table described by <layout> and return a Rendering with
+        its text and what was learnt about it.
+        '''
+
+        start = time.perf_counter()
+        chunks = self.chunks(layout)
+        packages = self.packages(layout)
+
+        return Rendering(self.name, chunks, packages, rows=layout.h,
+                columns=layout.w, seconds=time.perf_counter() - start)
+
+class LatexRenderer(Renderer):
+    name = 'latex'
+    extension = '.tex'
+    latex = True
+
+    def render(self, layout):
+        '''
+        Render a tabular environment with \\hline and \\cline rules. This is
+        the original output of odslatex. If the layout was built from a table,
+        it is rendered directly from the table, so that a RenderCache can be
+        used (option <cache>); otherwise from the cells and rules of the
+        layout.
+        '''
+
+        return ''.join(self.chunks(layout))
+
+    def chunks(self, layout):
+        if layout.table is not None:
+            header, lines, epilog = layout.table.latex_lines(
+                    escape=self.options['escape'], cache=self.options.get('cache'))
+        else:
+            header, lines, epilog = self.latex_lines(layout)
+
+        body = beautify_lines(lines)
+
+        if self.options['write_tabular_environment']:
+            return [header, body, epilog]
+
+        return [body]
+
+    def rule(self, layout, y):
+        rules = layout.rules_top[y]
+
+        if layout.w and rules.all():
+            return '\\hline'
+
+        return ''.join('\\cline{{{:d}-{:d}}}'.format(first, last)
+                for first, last in rule_runs(rules))
+
+    def latex_lines(self, layout):
+        '''
+        Return the header, the body and the epilog of the table described by
+        <layout>, like Table.latex_lines. Cells spanning several rows are
+        repeated, empty, in each of their rows (see Layout.alignments).
+        '''
+
+        header = '\\begin{tabular}{'
+        for x, drawn in enumerate(layout.column_rules):
+            header += '|' if drawn else ''
+            if x < layout.w:
+                header += LATEX_ALIGNMENTS[layout.column_alignments[x]]
+        header += '}\n'
+
+        # Cell covering each position, to fill the rows spanned by a
+        # \\multirow
+        owners = {}
+        for cell in layout.cells():
+            for y in range(cell.y, cell.y+cell.h):
+                for x in range(cell.x, cell.x+cell.w):
+                    owners[y, x] = cell
+
+        lines = []
+
+        rule = self.rule(layout, 0)
+        if rule:
+            lines.append([rule])
+
+        for y in range(layout.h):
+            rules_left = layout.rules_left[y]
+            cells = []
+
+            for x in range(layout.w):
+                # Positions not covered by any cell are left empty
+                cell = owners.get((y, x), Cell(y, x, 1, 1, '', layout.column_alignments[x]))
+                if cell.x != x:
+                    continue
+
+                text = ''
+                if cell.y == y:
+                    text = cell.text
+                    if self.options['escape']:
+                        text = cell_text(text)
+
+                alignment = cell.alignment
+                if layout.alignments is not None:
+                    alignment = layout.alignments[y,x]
+
+                cells.append(latex_cell(x, cell.h, cell.w, text, alignment, rules_left,
+                    layout.column_rules, layout.column_alignments))
+
+            lines.append(cells)
+
+            rule = self.rule(layout, y+1)
+            if rule:
+                lines.append([rule])
+
+        # The body always ends with a line break
+        lines.append([''])
+
+        return header, lines, '\\end{tabular}\n'
+
+    def packages(self, layout):
+        if any(cell.h > 1 for cell in layout.cells()):
+            return {'multirow'}
+
+        return set()
+
+class BooktabsRenderer(Renderer):
+    name = 'booktabs'
+    extension = '.tex'
+    latex = True
+
+    def rule(self, layout, y):
+        rules = layout.rules_top[y]
+
+        if layout.w and rules.all():
+            if y == 0:
+                return '\\toprule'
+            elif y == layout.h:
+                return '\\bottomrule'
+            else:
+                return '\\midrule'
+
+        return ''.join('\\cmidrule{{{:d}-{:d}}}'.format(first, last)
+                for first, last in rule_runs(rules))
+
+    def packages(self, layout):
+        packages = set()
+
+        if any(layout.rules_top.any(y) for y in range(layout.h+1)):
+            packages.add('booktabs')
+        if any(cell.h > 1 for cell in layout.cells()):
+            packages.add('multirow')
+
+        return packages
+
+    def render(self, layout):
+        '''
+        Render a tabular environment with the rules of the booktabs package.
+        Vertical rules are not drawn.
+        '''
+
+        # Cells covering each position, to fill the rows spanned by a
+        # \\multirow
+        owners = {}
+        for cell in layout.cells():
+            for y in range(cell.y+1, cell.y+cell.h):
+                owners[y, cell.x] = cell
+
+        lines = []
+
+        rule = self.rule(layout, 0)
+        if rule:
+            lines.append([rule])
+
+        for y in range(layout.h):
+            anchors = {cell.x : cell for cell in layout.rows[y]}
+            cells = []
+
+            x = 0
+            while x < layout.w:
+                if x in anchors:
+                    cell = anchors[x]
+                    text = cell.text
+                    if self.options['escape']:
+                        text = cell_text(text)
+                    if cell.h > 1:
+                        text = '\\multirow{{{:d}}}{{*}}{{{}}}'.format(cell.h, text)
+                    width = cell.w
+                elif (y, x) in owners:
+                    cell = owners[y, x]
+                    text = ''
+                    width = cell.w
+                else:
+                    # Covered by a cell spanning columns in this row
+                    x += 1
+                    continue
+
+                alignment = cell.alignment
+                if width > 1 or alignment != layout.column_alignments[x]:
+                    text = '\\multicolumn{{{:d}}}{{{}}}{{{}}}'.format(width,
+                            LATEX_ALIGNMENTS.get(alignment, 'l'), text)
+
+                cells.append(text)
+                x += width
+
+            cells[-1] += '\\\\'
+            lines.append(cells)
+
+            rule = self.rule(layout, y+1)
+            if rule:
+                lines.append([rule])
+
+        body = beautify_lines(lines)
+
+        if not self.options['write_tabular_environment']:
+            return body
+
+        header = '\\begin{tabular}{' + ''.join(
+                LATEX_ALIGNMENTS.get(alignment, 'l') for alignment in layout.column_alignments) + '}\n'
+
+        return header + body + '\\end{tabular}\n'
+
+class MarkdownRenderer(Renderer):
+    name = 'markdown'
+    extension = '.md'
+
+    def render(self, layout):
+        '''
+        Render a pipe table. The first row of the table is the header of the
+        Markdown table. Merged cells are not supported by Markdown: their text
+        is written in their first cell, and the rest are left empty. Rules are
+        not drawn.
+        '''
+
+        if layout.h == 0 or layout.w == 0:
+            return ''
+
+        rows = []
+        for y in range(layout.h):
+            row = layout.w*['']
+            for cell in layout.rows[y]:
+                text = cell.text
+                if self.options['escape']:
+                    text = strip_raw_latex(text).replace('|', '\\|')
+                row[cell.x] = text
+            rows.append(row)
+
+        alignments = [MARKDOWN_ALIGNMENTS.get(alignment, '---') for alignment in layout.column_alignments]
+
+        widths = [max(3, *(len(row[x]) for row in rows)) for x in range(layout.w)]
+
+        def line(cells):
+            return '| ' + ' | '.join(cell.ljust(width) for cell, width in zip(cells, widths)) + ' |\n'
+
+        lines = [line(rows[0])]
+        lines.append('| ' + ' | '.join(
+            alignment[0] + (width-2)*'-' + alignment[-1]
+            for alignment, width in zip(alignments, widths)) + ' |\n')
+        lines.extend(map(line, rows[1:]))
+
+        return ''.join(lines)
+
+class HtmlRenderer(Renderer):
+    name = 'html'
+    extension = '.html'
+
+    def render(self, layout):
+        '''
+        Render an HTML table, with rowspan and colspan for the merged cells
+        and inline styles for the alignments and rules.
+        '''
+
+        lines = []
+        for y in range(layout.h):
+            lines.append('  <tr>\n')
+
+            for cell in layout.rows[y]:
+                attribs = ''
+                if cell.h > 1:
+                    attribs += ' rowspan="{:d}"'.format(cell.h)
+                if cell.w > 1:
+                    attribs += ' colspan="{:d}"'.format(cell.w)
+
+                styles = []
+                if cell.alignment in HTML_ALIGNMENTS:
+                    styles.append('text-align: {}'.format(HTML_ALIGNMENTS[cell.alignment]))
+
+                for side, drawn in [
+                        ('top',    layout.rules_top[cell.y, cell.x]),
+                        ('bottom', layout.rules_top[cell.y+cell.h, cell.x]),
+                        ('left',   layout.rules_left[cell.y, cell.x]),
+                        ('right',  layout.rules_left[cell.y, cell.x+cell.w])]:
+                    if drawn:
+                        styles.append('border-{}: 1px solid'.format(side))
+
+                if styles:
+                    attribs += ' style="{}"'.format('; '.join(styles))
+
+                text = html.escape(strip_raw_latex(cell.text)) if self.options['escape'] else cell.text
+                lines.append('    <td{}>{}</td>\n'.format(attribs, text))
+
+            lines.append('  </tr>\n')
+
+        body = ''.join(lines)
+
+        if not self.options['write_tabular_environment']:
+            return body
+
+        return '<table style="border-collapse: collapse">\n' + body + '</table>\n'
+
+RENDERERS = {
+        renderer.name : renderer for renderer in
+        [LatexRenderer, BooktabsRenderer, MarkdownRenderer, HtmlRenderer]
+        }
+
+def get_renderer(name, **kwargs):
+    '''
+    Return a renderer for the format <name> with the given options.
+    '''
+
+    if name not in RENDERERS:
+        raise Exception('Unknown output format {}. Available formats: {}'.format(
+            name, ', '.join(RENDERERS)))
+
+    return RENDERERS[name](**kwargs)
@@ -0,0 +1,222 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+'''
+Transfer of tables between processes through memory-mapped files.
+
+A SharedTable writes the arrays of a table to a file (in /dev/shm when it
+exists, so it never touches the disk), together with a compact form of the
+text of its cells. Other processes attach the table from the name of the
+file: its arrays are mapped from the file instead of copied, and only the
+text of the cells is decoded. Sending the name of the file to a worker
+costs nothing, compared with pickling the whole table.
+
+In the process that owns the table:
+
+    with SharedTable(table) as shared:
+        pool.map(render, [shared.filename]*n)
+
+and in the workers:
+
+    table = Table.attach(filename)
+'''
+
+import os
+import json
+import itertools
+import mmap
+import tempfile
+import numpy as np
+from .borders import BorderGrid
+from .numformat import number_formatter
+
+# Identifies the files written by SharedTable, and the version of their layout
+MAGIC = b'ODSLATEX-TABLE-1'
+
+# Alignment of each section of the file, in bytes
+ALIGNMENT = 64
+
+# Arrays of the table mapped from the file
+ARRAYS = ['merged', 'owner', 'sizes', 'text_alignments', 'values', 'number_formats']
+
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+def _align(n):
+    return -(-n//ALIGNMENT)*ALIGNMENT
+
+# Separator of the texts of the cells. XML documents can not contain it, so
+# it is never found in the text read from an .ods file
+SEPARATOR = '\0'
+
+def encode_text(data):
+    '''
+    Encode the text of the cells in <data> (a list of rows) as UTF-8 bytes,
+    and a mask of the cells whose text is None.
+
+    The texts are joined with SEPARATOR, so that they are split in one go.
+    If some text contains it, they are joined without separator, and the
+    offsets of each text in the decoded string are returned too (None
+    otherwise).
+    '''
+
+    texts = list(itertools.chain.from_iterable(data))
+
+    none = np.zeros(len(texts), dtype=bool)
+    if None in texts:
+        none[:] = [text is None for text in texts]
+        texts = ['' if text is None else text for text in texts]
+
+    joined = SEPARATOR.join(texts)
+    if joined.count(SEPARATOR) == max(len(texts)-1, 0):
+        return joined.encode('utf-8'), None, none
+
+    offsets = np.zeros(len(texts)+1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)), out=offsets[1:])
+
+    return ''.join(texts).encode('utf-8'), offsets, none
+
+def decode_text(buffer, offsets, none, h, w):
+    '''
+    Rebuild the rows of text encoded by encode_text.
+    '''
+
+    text = bytes(buffer).decode('utf-8')
+
+    if h*w == 0:
+        texts = []
+    elif offsets is None:
+        texts = text.split(SEPARATOR)
+    else:
+        offsets = offsets.tolist()
+        texts = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    for n in np.flatnonzero(none).tolist():
+        texts[n] = None
+
+    return [texts[y*w:(y+1)*w] for y in range(h)]
+
+class SharedTable:
+    def __init__(self, table, dirname=None):
+        '''
+        Write <table> to a new file in <dirname> (/dev/shm, or the temporary
+        directory, by default), that other processes can attach with
+        Table.attach(filename). The file is removed by close(), or when
+        leaving the with block. Processes that attached the table before can
+        keep using it.
+        '''
+
+        text, offsets, none = encode_text(table.data)
+        borders_top  = np.frombuffer(table.borders_top.tobytes(), dtype=np.uint8)
+        borders_left = np.frombuffer(table.borders_left.tobytes(), dtype=np.uint8)
+
+        sections = [(name, np.ascontiguousarray(getattr(table, name))) for name in ARRAYS]
+        if offsets is not None:
+            sections.append(('text_offsets', offsets))
+
+        sections += [
+                ('text', np.frombuffer(text, dtype=np.uint8)),
+                ('text_none', none),
+                ('borders_top', borders_top),
+                ('borders_left', borders_left)
+                ]
+
+        header = {
+                'h'          : table.h,
+                'w'          : table.w,
+                'formatters' : [formatter.args for formatter in table.formatters],
+                'sections'   : {}
+                }
+
+        # The offsets of the sections are counted from the end of the header,
+        # which is only known once they are in it
+        offset = 0
+        for name, array in sections:
+            header['sections'][name] = [offset, list(array.shape), array.dtype.str]
+            offset = _align(offset + array.nbytes)
+
+        encoded = json.dumps(header).encode('utf-8')
+        start = _align(len(MAGIC) + 8 + len(encoded))
+
+        self.closed = False
+        fd, self.filename = tempfile.mkstemp(prefix='odslatex-', suffix='.table',
+                dir=dirname if dirname is not None else SHARED_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC)
+                f.write(start.to_bytes(8, 'little'))
+                f.write(encoded)
+                for name, array in sections:
+                    f.seek(start + header['sections'][name][0])
+                    f.write(array.reshape(-1).view(np.uint8))
+        except BaseException:
+            os.unlink(self.filename)
+            raise
+
+    def close(self):
+        if not self.closed:
+            os.unlink(self.filename)
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def attach_table(cls, filename):
+    '''
+    Return a table of class <cls> with the contents of the file <filename>,
+    written by SharedTable. The arrays of the table are mapped from the file
+    copy-on-write: they are not copied, and changes to them stay private to
+    this process.
+    '''
+
+    with open(filename, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise Exception('{} is not a table written by odslatex.'.format(filename))
+
+    start = int.from_bytes(buffer[len(MAGIC):len(MAGIC)+8], 'little')
+    header = json.loads(bytes(buffer[len(MAGIC)+8:start]).rstrip(b'\0').decode('utf-8'))
+
+    def section(name):
+        offset, shape, dtype = header['sections'][name]
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        if count == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=start+offset).reshape(shape)
+
+    h, w = header['h'], header['w']
+
+    table = cls.__new__(cls)
+    table.h = h
+    table.w = w
+
+    for name in ARRAYS:
+        setattr(table, name, section(name))
+
+    offsets = section('text_offsets') if 'text_offsets' in header['sections'] else None
+    table.data = decode_text(section('text'), offsets, section('text_none'), h, w)
+    table.borders_top  = BorderGrid.frombuffer(section('borders_top'), h+1, w)
+    table.borders_left = BorderGrid.frombuffer(section('borders_left'), h, w+1)
+    table.formatters = [number_formatter(*args) for args in header['formatters']]
+
+    return table
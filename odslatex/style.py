@@ -17,6 +17,30 @@
 # You should have received a copy of the GNU General Public License along with
 # odslatex. If not, see <https://www.gnu.org/licenses/>.
 
+from lxml import etree
+from .numformat import read_number_styles
+
+ns = {
+        'style'  : 'urn:oasis:names:tc:opendocument:xmlns:style:1.0',
+        'fo'     : 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
+        }
+
+STYLE_TAG         = etree.QName(ns['style'],'style')
+DEFAULT_STYLE_TAG = etree.QName(ns['style'],'default-style')
+FAMILY_KEY        = etree.QName(ns['style'],'family')
+NAME_KEY          = etree.QName(ns['style'],'name')
+PARENT_KEY        = etree.QName(ns['style'],'parent-style-name')
+DATA_STYLE_KEY    = etree.QName(ns['style'],'data-style-name')
+
+CELL_PROPERTIES_TAG      = etree.QName(ns['style'],'table-cell-properties')
+PARAGRAPH_PROPERTIES_TAG = etree.QName(ns['style'],'paragraph-properties')
+
+BORDER_KEY = etree.QName(ns['fo'],'border')
+SIDE_KEYS  = [etree.QName(ns['fo'],'border-' + side)
+        for side in ['top', 'right', 'bottom', 'left']]
+VERTICAL_ALIGN_KEY = etree.QName(ns['style'],'vertical-align')
+TEXT_ALIGN_KEY     = etree.QName(ns['fo'],'text-align')
+
 class Style:
     def __init__(self, attribs):
         '''
@@ -27,6 +51,7 @@ class Style:
         borders:    [top, right, bottom, left], ([False, False, False, False]).
                     Four boolean values telling whether the borders of the cell
                     are drawn.
+        data-style: Name of the data style (number format) of the cell.
         '''
 
         self.attribs = self.default_attributes()
@@ -39,5 +64,171 @@ class Style:
                 'borders'        : [False, False, False, False],
                 'vertical-align' : 'Default',
                 'text-align'     : 'Default',
+                'data-style'     : None,
                 }
-        
+
+def read_cell_style(element):
+    '''
+    Read the properties set by the cell style <element> (a <style:style> or
+    <style:default-style>) itself, without those it inherits. Return a
+    dictionary with the keys of Style.default_attributes that are set, plus
+    'parent' (the name of the parent style, or None). Each of the borders is
+    None if the style does not set it.
+    '''
+
+    attribs = {
+            'parent'  : element.get(PARENT_KEY),
+            'borders' : 4*[None]
+            }
+
+    borders = attribs['borders']
+
+    for prop in element.iter(CELL_PROPERTIES_TAG):
+        # fo:border sets the four borders, and the sides override it
+        if BORDER_KEY in prop.attrib:
+            borders[:] = 4*['solid' in prop.attrib[BORDER_KEY]]
+
+        for n, key in enumerate(SIDE_KEYS):
+            if key in prop.attrib:
+                borders[n] = 'solid' in prop.attrib[key]
+
+        if prop.get(VERTICAL_ALIGN_KEY):
+            attribs['vertical-align'] = prop.attrib[VERTICAL_ALIGN_KEY]
+
+    for prop in element.iter(PARAGRAPH_PROPERTIES_TAG):
+        if prop.get(TEXT_ALIGN_KEY):
+            attribs['text-align'] = prop.attrib[TEXT_ALIGN_KEY]
+
+    if DATA_STYLE_KEY in element.attrib:
+        attribs['data-style'] = element.attrib[DATA_STYLE_KEY]
+
+    return attribs
+
+def read_cell_styles(tree):
+    '''
+    Read the cell styles defined in <tree> (see read_cell_style). Return a
+    dictionary mapping each style name to its properties, and the
+    properties of the default cell style (None if <tree> has none).
+    '''
+
+    styles = {}
+    for element in tree.iter(STYLE_TAG):
+        if element.get(FAMILY_KEY) == 'table-cell':
+            styles[element.attrib[NAME_KEY]] = read_cell_style(element)
+
+    default = None
+    for element in tree.iter(DEFAULT_STYLE_TAG):
+        if element.get(FAMILY_KEY) == 'table-cell':
+            default = read_cell_style(element)
+
+    return styles, default
+
+class StyleSheet:
+    def __init__(self, content, styles=None):
+        '''
+        Create the cell styles of a document, from its parsed content.xml
+        <content> and its styles.xml <styles>. <styles> is the root element
+        of styles.xml, a function returning it (or None), or None if the
+        document has no common styles.
+
+        The automatic styles of content.xml are read at once. styles.xml holds
+        the common (named) styles, like "Default" or "Heading", and the
+        default cell style; it is only read the first time a style is
+        resolved. sheet[name] returns the Style of <name> with all the
+        properties it inherits through style:parent-style-name. Every style
+        is resolved once, so looking up a style afterwards costs a single
+        dictionary access.
+
+        Number styles defined in styles.xml are available through
+        number_styles once a style has been resolved.
+        '''
+
+        self.automatic = read_cell_styles(content)[0]
+        self.source = styles
+        self.named = None
+        self.default = None
+        self.number_styles = {}
+        self.resolved = {}
+        self._default_style = None
+
+    def load_named(self):
+        '''
+        Read the common styles from styles.xml, if not done yet.
+        '''
+
+        if self.named is not None:
+            return
+
+        tree = self.source() if callable(self.source) else self.source
+
+        if tree is None:
+            self.named = {}
+            return
+
+        self.named, self.default = read_cell_styles(tree)
+        self.number_styles = read_number_styles(tree)
+
+    def __getitem__(self, name):
+        try:
+            return self.resolved[name]
+        except KeyError:
+            return self.resolve(name)
+
+    def resolve(self, name, pending=()):
+        '''
+        Return the Style of <name>, flattening its chain of parent styles.
+        Styles that are not defined, and chains that loop, end in the default
+        cell style. <pending> are the styles being resolved further down the
+        chain.
+        '''
+
+        if name in self.resolved:
+            return self.resolved[name]
+
+        self.load_named()
+
+        definition = self.automatic.get(name)
+        if definition is None:
+            definition = self.named.get(name)
+
+        if name in pending:
+            return self.default_style()
+
+        if definition is None:
+            self.resolved[name] = self.default_style()
+            return self.resolved[name]
+
+        if definition['parent'] is None:
+            base = self.default_style()
+        else:
+            base = self.resolve(definition['parent'], pending + (name,))
+
+        attribs = dict(base.attribs)
+        for key, value in definition.items():
+            if key == 'borders':
+                attribs[key] = [old if new is None else new
+                        for old, new in zip(base.attribs[key], value)]
+            elif key != 'parent':
+                attribs[key] = value
+
+        attribs['name'] = name
+        self.resolved[name] = Style(attribs)
+
+        return self.resolved[name]
+
+    def default_style(self):
+        '''
+        Return the Style of the default cell style of the document, which
+        the styles without a parent inherit.
+        '''
+
+        if self._default_style is None:
+            self.load_named()
+            attribs = {}
+            if self.default is not None:
+                attribs = {key : value for key, value in self.default.items()
+                        if key != 'parent'}
+                attribs['borders'] = [bool(value) for value in attribs['borders']]
+            self._default_style = Style(attribs)
+
+        return self._default_style
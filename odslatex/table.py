@@ -18,12 +18,88 @@
 # odslatex. If not, see <https://www.gnu.org/licenses/>.
 
 import numpy as np
-from .style import Style
+from .style import StyleSheet
+from .borders import BorderGrid
+from .reader import read_content, open_source, source_name, styles_loader
+from .shared import SharedTable, attach_table
+from .escape import cell_text
+from .renderers import latex_cell
+from .numformat import NUMERIC_VALUE_TYPES, number_formatter, read_number_styles
 from lxml import etree
-from zipfile import ZipFile
 import os
+import sys
 import csv
 
+# Default size of the window drawn by Table.preview
+PREVIEW_ROWS    = 10
+PREVIEW_COLUMNS = 8
+
+# Codes of Table.number_formats for the numeric cells that have no number
+# format, by value type
+NO_FORMAT            = -1
+NO_FORMAT_PERCENTAGE = -2
+NO_FORMAT_CURRENCY   = -3
+
+def index_dtype(h, w):
+    '''
+    Return the smallest integer type for the owner and sizes arrays of a
+    table of <h> x <w> cells, leaving room for the arithmetic done with them
+    (like 3*width).
+    '''
+
+    for dtype in [np.int16, np.int32]:
+        if 8*(max(h, w) + 1) <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+
+def index_ranges(name, ranges):
+    '''
+    Describe the (first, last) <ranges> of rows or columns (last excluded),
+    like "rows 0-9, 90-99". Empty ranges are left out, and if all of them
+    are empty the description is "no rows".
+    '''
+
+    ranges = ['{:d}-{:d}'.format(first, last-1) for first, last in ranges if last > first]
+    if not ranges:
+        return 'no ' + name
+
+    return name + ' ' + ', '.join(ranges)
+
+def format_size(nbytes):
+    '''
+    Return a number of bytes in a human-readable form, like 1.5 GB.
+    '''
+
+    for unit in ['bytes', 'kB', 'MB', 'GB']:
+        if nbytes < 1024:
+            break
+        nbytes /= 1024
+    else:
+        unit = 'TB'
+
+    return '{:.0f} {}'.format(nbytes, unit) if unit == 'bytes' else '{:.1f} {}'.format(nbytes, unit)
+
+def check_table_size(h, w, max_cells=None, max_memory=None, name=None):
+    '''
+    Raise an exception if a table of <h> x <w> cells has more than
+    <max_cells> cells, or would take more than <max_memory> bytes (see
+    Table.estimate_memory). <name> is the name of the sheet, for the message.
+    '''
+
+    sheet = 'Sheet {} ({:d} x {:d})'.format(name, h, w) if name is not None \
+            else 'The table ({:d} x {:d})'.format(h, w)
+
+    if max_cells is not None and h*w > max_cells:
+        raise Exception('{} has {:d} cells, more than the limit of {:d} (--max-cells).'.format(
+            sheet, h*w, max_cells))
+
+    if max_memory is not None:
+        memory = Table.estimate_memory(h, w)
+        if memory > max_memory:
+            raise Exception('{} would take about {} to read, more than the limit of {} (--max-memory).'.format(
+                sheet, format_size(memory), format_size(max_memory)))
+
 class Table:
     def __init__(self,h,w):
         '''
@@ -40,22 +116,77 @@ class Table:
         for _ in range(h):
             self.data.append(w*[''])
 
-        self.borders_top   = np.zeros([h+1,w],dtype=bool)
-        self.borders_left  = np.zeros([h,w+1],dtype=bool)
+        self.borders_top   = BorderGrid(h+1,w)
+        self.borders_left  = BorderGrid(h,w+1)
+        # Each cell starts owning itself. The integer type of owner and sizes
+        # depends on the size of the table
+        dtype = index_dtype(h, w)
         self.merged = np.zeros([h,w], dtype=bool)
-        self.owner  = np.zeros([h,w,2], dtype=int)
-        self.sizes  = np.ones([h,w,2], dtype=int)
+        self.owner  = np.empty([h,w,2], dtype=dtype)
+        self.owner[:,:,0] = np.arange(h, dtype=dtype)[:,None]
+        self.owner[:,:,1] = np.arange(w, dtype=dtype)[None,:]
+        self.sizes  = np.ones([h,w,2], dtype=dtype)
         self.text_alignments = np.tile('default', [h,w])
 
-        for y in range(h):
-            for x in range(w):
-                self.owner[y,x,0] = y
-                self.owner[y,x,1] = x
+        # Numeric value of each cell (NaN for non-numeric cells), and index in
+        # self.formatters of the number format of the cell (NO_FORMAT,
+        # NO_FORMAT_PERCENTAGE or NO_FORMAT_CURRENCY if it has none)
+        self.values = np.full([h,w], np.nan)
+        self.number_formats = np.full([h,w], NO_FORMAT, dtype=np.int16)
+        self.formatters = []
 
         self.h = h
         self.w = w
 
+    @staticmethod
+    def estimate_memory(h, w):
+        '''
+        Return an estimate of the memory, in bytes, taken by a table of <h> x
+        <w> cells right after being created, before the text of its cells is
+        read. It is cheap, so it can be checked before allocating the table.
+        '''
+
+        itemsize = index_dtype(h, w).itemsize
+
+        per_cell = (
+                8 +                                     # reference in data
+                1 +                                     # merged
+                4*itemsize +                            # owner and sizes
+                np.dtype('<U7').itemsize +              # text_alignments
+                8 +                                     # values
+                2)                                      # number_formats
+
+        per_row = (
+                sys.getsizeof([]) + 8 +                 # list in data
+                2*(sys.getsizeof(bytearray()) + 8) +    # rows of the borders
+                (w+7)//8 + (w+8)//8)                    # bits of the borders
+
+        return h*w*per_cell + (h+1)*per_row
+
+    def share(self, dirname=None):
+        '''
+        Write the table to a memory-mapped file that other processes can
+        attach with Table.attach, without pickling it. Return a SharedTable:
+        pass its filename to the other processes, and close it when they are
+        done (see the shared module).
+        '''
+
+        return SharedTable(self, dirname)
+
+    @classmethod
+    def attach(cls, filename):
+        '''
+        Return the table shared in <filename> by Table.share. Its arrays are
+        mapped from the file instead of copied.
+        '''
+
+        return attach_table(cls, filename)
+
     def __repr__(self):
+        # Large tables are shown through a viewport, to keep printing them fast
+        if self.h > 2*PREVIEW_ROWS or self.w > PREVIEW_COLUMNS:
+            return self.preview()
+
         # First we determine the max width of each column
         maxw = self.w*[0]
 
@@ -91,7 +222,7 @@ class Table:
             # First draw the top border
             border_str = ' '
             for x in range(self.w):
-                border_str += ''.join((maxw[x]+2)*['-' if self.borders_top[y][x] else ' '])
+                border_str += ''.join((maxw[x]+2)*['-' if self.borders_top[y,x] else ' '])
                 border_str += ' '
 
             ans += border_str + '\n'
@@ -100,35 +231,150 @@ class Table:
             for x in range(self.w):
                 if self.sizes[y,x,1] != 0:
                     cell_width = sum(maxw[x:x+self.sizes[y,x,1]]) + 3*self.sizes[y,x,1]-1
-                    fmt_str = ('|' if self.borders_left[y][x] else ' ') + '{:^' + str(cell_width) + '}' 
+                    fmt_str = ('|' if self.borders_left[y,x] else ' ') + '{:^' + str(cell_width) + '}' 
                     ans += fmt_str.format(self.data[y][x])
 
                 if x == self.w-1:
-                    ans += '|' if self.borders_left[y][-1] else ' '
+                    ans += '|' if self.borders_left[y,-1] else ' '
 
             ans += '\n'
 
         border_str = ' '
         for x in range(self.w):
-            border_str += ''.join((maxw[x]+2)*['-' if self.borders_top[self.h][x] else ' '])
+            border_str += ''.join((maxw[x]+2)*['-' if self.borders_top[self.h,x] else ' '])
             border_str += ' '
         ans += border_str + '\n'
         return ans
 
+    def preview(self, head=PREVIEW_ROWS, tail=PREVIEW_ROWS, columns=None, max_width=30):
+        '''
+        Return an ASCII drawing of a window of the table. Only the first <head>
+        and last <tail> rows, and the columns in the range <columns>, are drawn,
+        so the cost does not depend on the size of the table. Elided rows and
+        columns are marked with dots.
+
+        Parameters:
+        -----------
+
+        head (int): number of rows drawn from the top of the table
+        tail (int): number of rows drawn from the bottom of the table
+        columns (tuple): (first, last) range of columns drawn, last excluded.
+                         By default, the first PREVIEW_COLUMNS columns.
+        max_width (int): longer cell texts are cut to this length
+        '''
+
+        if columns is None:
+            columns = (0, PREVIEW_COLUMNS)
+
+        x_start = max(0, min(columns[0], self.w))
+        x_end   = max(x_start, min(columns[1], self.w))
+
+        if head + tail >= self.h:
+            rows = list(range(self.h))
+        else:
+            rows = list(range(head)) + [None] + list(range(self.h-tail, self.h))
+
+        # Split each visible row into segments of consecutive columns that
+        # belong to the same cell
+        segments = {}
+        for y in rows:
+            if y is None:
+                continue
+
+            curr_segments = []
+            x = x_start
+            while x < x_end:
+                y0, x0 = self.owner[y,x]
+                x1 = x+1
+                while x1 < x_end and np.all(self.owner[y,x1] == [y0,x0]):
+                    x1 += 1
+
+                text = self.data[y0][x0] if y0 == y else ''
+                text = text or ''
+                if len(text) > max_width:
+                    text = text[:max_width-3] + '...'
+
+                curr_segments.append((x, x1, text))
+                x = x1
+
+            segments[y] = curr_segments
+
+        # Width of each visible column, first from the cells spanning a single
+        # column, then enlarged to fit the merged cells
+        maxw = (x_end-x_start)*[0]
+
+        for curr_segments in segments.values():
+            for x0, x1, text in curr_segments:
+                if x1 - x0 == 1:
+                    maxw[x0-x_start] = max(maxw[x0-x_start], len(text))
+
+        for curr_segments in segments.values():
+            for x0, x1, text in curr_segments:
+                if x1 - x0 > 1:
+                    combined_length = sum(maxw[x0-x_start:x1-x_start]) + 3*(x1-x0-1)
+                    if len(text) > combined_length:
+                        dif = len(text) - combined_length
+                        extra_space = -(-dif//(x1-x0))
+                        for x in range(x0, x1):
+                            maxw[x-x_start] += extra_space
+
+        left  = ' ... ' if x_start > 0 else ''
+        right = ' ...' if x_end < self.w else ''
+
+        # Horizontal borders, only drawn if there is some rule in the window
+        def border_lines(y):
+            if not self.borders_top.any(y) or not np.any(self.borders_top[y,x_start:x_end]):
+                return []
+
+            parts = [' '*len(left), ' ']
+            for x in range(x_start, x_end):
+                parts.append((maxw[x-x_start]+2)*('-' if self.borders_top[y,x] else ' '))
+                parts.append(' ')
+            return [''.join(parts).rstrip()]
+
+        if None in rows:
+            shown_rows = [(0, head), (self.h-tail, self.h)]
+        else:
+            shown_rows = [(0, self.h)]
+
+        lines = ['{:d} x {:d} table, {} and {} shown'.format(self.h, self.w,
+            index_ranges('rows', shown_rows), index_ranges('columns', [(x_start, x_end)]))]
+
+        for y in rows:
+            if y is None:
+                lines.append(' '*len(left) + ' ' + '.'*(sum(maxw) + 3*len(maxw) - 1))
+                continue
+
+            lines.extend(border_lines(y))
+
+            parts = [left]
+            for x0, x1, text in segments[y]:
+                cell_width = sum(maxw[x0-x_start:x1-x_start]) + 3*(x1-x0) - 1
+                parts.append('|' if self.borders_left[y,x0] else ' ')
+                parts.append('{{:^{:d}}}'.format(cell_width).format(text))
+            parts.append('|' if self.borders_left[y,x_end] else ' ')
+            parts.append(right)
+            lines.append(''.join(parts))
+
+        if rows and rows[-1] is not None:
+            lines.extend(border_lines(rows[-1]+1))
+
+        return '\n'.join(lines) + '\n'
+
     def add_column(self, pos):
         for y in range(self.h):
             self.data[y].insert(pos, '')
 
-        self.borders_left  = np.insert(self.borders_left, pos, self.borders_left[:,pos], axis=1)
-        self.borders_top   = np.insert(self.borders_top, pos, self.borders_top[:,pos], axis=1)
+        self.borders_left.insert_column(pos, copy_from=pos)
+        self.borders_top.insert_column(pos, copy_from=pos)
 
         self.w += 1
 
     def add_row(self, pos):
         self.data.insert(pos, ['']*self.w)
 
-        self.borders_left = np.insert(self.borders_left, pos, self.borders_left[pos,:], axis=0)
-        self.borders_top = np.insert(self.borders_top, pos, self.borders_top[pos,:], axis=0)
+        self.borders_left.insert_row(pos, copy_from=pos)
+        self.borders_top.insert_row(pos, copy_from=pos)
 
         self.h += 1
 
@@ -138,16 +384,15 @@ class Table:
         if h == 1 and w == 1: return
 
         for y in range(y0,y0+h):
+            # Remove the borders inside the merged cell
+            self.borders_left.set_range(y, x0+1, x0+w, False)
+            if y != y0:
+                self.borders_top.set_range(y, x0, x0+w, False)
+
             for x in range(x0,x0+w):
                 self.merged[y,x] = True
                 self.owner[y,x,:] = [y0,x0]
 
-                if x != x0:
-                    self.borders_left[y][x] = False
-
-                if y != y0:
-                    self.borders_top[y][x] = False
-
                 if x != x0 or y != y0:
                     self.data[y][x] = '*'
                     self.sizes[y,x,:] = 0
@@ -155,6 +400,45 @@ class Table:
     def set(self,y,x,value):
         self.data[y][x] = value
 
+    def format_numbers(self, decimal_places=None):
+        '''
+        Rewrite the text of the numeric cells from their values. By default
+        each cell is formatted with the number format of its data style; cells
+        whose data style does not fix the number of decimal places keep the
+        text displayed by the spreadsheet.
+
+        Parameters:
+        -----------
+
+        decimal_places (int): if given, format every numeric cell with this 
+        number of decimal places instead of those of its data style. The rest
+        of the format (percentage, grouping, integer digits) is kept, and
+        currency cells keep the text displayed by the spreadsheet.
+        '''
+
+        if decimal_places is not None:
+            decimal_places = int(decimal_places)
+            formatters = {n: number_formatter(decimal_places, *formatter.args[1:])
+                    for n, formatter in enumerate(self.formatters)}
+            formatters[NO_FORMAT] = number_formatter(decimal_places)
+            formatters[NO_FORMAT_PERCENTAGE] = number_formatter(decimal_places, percentage=True)
+        else:
+            formatters = dict(enumerate(self.formatters))
+
+        numeric = ~np.isnan(self.values)
+        number_formats = np.where(numeric, self.number_formats, NO_FORMAT_CURRENCY)
+
+        # Format each column in bulk, one call per number format
+        for x in range(self.w):
+            column = number_formats[:,x]
+            for n in np.unique(column).tolist():
+                if n not in formatters:
+                    continue
+                rows = np.flatnonzero(column == n)
+                texts = formatters[n](self.values[rows,x])
+                for y, text in zip(rows.tolist(), texts):
+                    self.data[y][x] = text
+
     def get_cell_dimensions(self, y0, x0):
         '''
         Return the dimensions of the cell that starts in (y0,x0).
@@ -186,18 +470,16 @@ class Table:
         h, w = self.get_cell_dimensions(y0, x0)
 
         # Set the top and bottom borders
-        for x in range(x0, x0+w):
-            if borders[0]:
-                self.borders_top[y0,x] = True
-            if borders[2]:
-                self.borders_top[y0+h,x] = True
+        if borders[0]:
+            self.borders_top.set_range(y0, x0, x0+w, True)
+        if borders[2]:
+            self.borders_top.set_range(y0+h, x0, x0+w, True)
 
         # Set the right and left borders
-        for y in range(y0, y0+h):
-            if borders[1]:
-                self.borders_left[y,x0+w] = True
-            if borders[3]:
-                self.borders_left[y,x0] = True
+        if borders[1]:
+            self.borders_left.set_column(x0+w, y0, y0+h, True)
+        if borders[3]:
+            self.borders_left.set_column(x0, y0, y0+h, True)
 
 
     def all_elements(self):
@@ -241,19 +523,65 @@ class Table:
 
     @classmethod
     def from_ods(cls, filename, **opts):
+        '''
+        Read a table from the .ods file <filename>. Instead of its name, the
+        contents of the file (bytes, bytearray, memoryview...) or a binary
+        file object can be given, and they are read without a temporary file.
+
+        Options:
+        --------
+
+        sheet (int): which sheet to read (0 by default)
+        print_debug_info (bool): print the arrays of the table after reading it
+        skip_hidden (bool): drop the rows and columns hidden in the sheet 
+                            (collapsed or filtered out). Merged cells are 
+                            shrunk to their visible part.
+        stream (bool): parse the file while it is being inflated, on two
+                       threads (see reader.read_content)
+        max_cells (int): refuse to read sheets with more cells than this
+        max_memory (int): refuse to read sheets whose table would take more
+                          bytes than this (see Table.estimate_memory)
+        '''
+
         options = {
-                'sheet' : 0 ,
-                'print_debug_info' : False
+                'stream' : False
                 }
 
         options.update(**opts)
 
-        with ZipFile(filename, 'r') as zipobj:
-            xml_content = zipobj.read('content.xml')
-            #os.system('xmllint --format ' + os.path.join(tmpdir, 'content.xml') + '>' + os.path.join(tmpdir, 'content2.xml'))
+        source = open_source(filename)
+        tree = read_content(source, stream=options.pop('stream'))
+
+        return cls.from_content(tree, filename=source_name(filename),
+                styles=styles_loader(source), **options)
+
+    @classmethod
+    def from_content(cls, tree, **opts):
+        '''
+        Read a table from <tree>, the root element of the content.xml file of
+        an .ods file (see reader.read_content). The tree is not modified, so
+        it can be parsed once and used to read several sheets.
+
+        The options are those of from_ods, except stream, plus:
 
-        #tree = etree.parse('test2/content.xml')
-        tree = etree.fromstring(xml_content)
+        filename (str): name of the file the tree was read from, used in the
+                        error messages
+        styles: the root element of the styles.xml file, with the common
+                styles the cell styles inherit, or a function returning it
+                (see style.StyleSheet). None if there are no common styles.
+        '''
+
+        options = {
+                'sheet' : 0 ,
+                'print_debug_info' : False,
+                'skip_hidden' : False,
+                'max_cells' : None,
+                'max_memory' : None,
+                'filename' : None,
+                'styles' : None
+                }
+
+        options.update(**opts)
 
         ns = {
                 'table'  : 'urn:oasis:names:tc:opendocument:xmlns:table:1.0',
@@ -263,91 +591,11 @@ class Table:
                 'fo'     : 'urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0'
                 }
 
-        default_style = Style({})
-
-        # Read all the row, column, and cell styles
-        column_styles = {}
-        row_styles    = {}
-        cell_styles   = {
-                'Default' : default_style
-                }
-
-        for style in tree.iter(etree.QName(ns['style'],'style')):
-            family = style.attrib[etree.QName(ns['style'],'family')]
-
-            if family == 'table-row':
-                family = style.attrib[etree.QName(ns['style'],'family')]
-                row_styles[family] = None
-
-            elif family == 'table-column':
-                family = style.attrib[etree.QName(ns['style'],'family')]
-                column_styles[family] = None
-
-            elif family == 'table-cell':
-                # Here we read the borders of the style
-
-                # First, set default values
-                borders = 4*[False]
-
-                # Vertical alignment (TODO: not used yet)
-                v_al = None
-
-                # Text alignment
-                t_al = None
-
-                bt_tag = etree.QName(ns['fo'],'border-top')
-                br_tag = etree.QName(ns['fo'],'border-right')
-                bb_tag = etree.QName(ns['fo'],'border-bottom')
-                bl_tag = etree.QName(ns['fo'],'border-left')
-                b__tag = etree.QName(ns['fo'],'border')
-
-                v_al_tag = etree.QName(ns['style'],'vertical-align')
-
-                t_al_tag = etree.QName(ns['fo'],'text-align')
-
-                style_name = style.attrib[etree.QName(ns['style'],'name')]
-
-                for prop in style.iter(etree.QName(ns['style'],'table-cell-properties')):
-                    if bt_tag in prop.attrib:
-                        if 'solid' in prop.attrib[bt_tag]:
-                            borders[0] = True
-
-                    if br_tag in prop.attrib:
-                        if 'solid' in prop.attrib[br_tag]:
-                            borders[1] = True
-
-                    if bb_tag in prop.attrib:
-                        if 'solid' in prop.attrib[bb_tag]:
-                            borders[2] = True
-
-                    if bl_tag in prop.attrib:
-                        if 'solid' in prop.attrib[bl_tag]:
-                            borders[3] = True
-
-                    if b__tag in prop.attrib:
-                        if 'solid' in prop.attrib[b__tag]:
-                            borders = [True, True, True, True]
-
-                    if v_al_tag in prop.attrib:
-                        v_al = prop.attrib[v_al_tag]
-
-
-                for prop in style.iter(etree.QName(ns['style'],'paragraph-properties')):
-                    if t_al_tag in prop.attrib:
-                        t_al = prop.attrib[t_al_tag]
-
-                cell_styles[style_name] = \
-                        Style({ 'name'               : style_name,
-                                'borders'            : borders})
-
-                if t_al:
-                    cell_styles[style_name].attribs['text-align'] = t_al
+        # The cell styles, resolved on demand with the styles they inherit
+        cell_styles = StyleSheet(tree, options['styles'])
 
-                if v_al:
-                    cell_styles[style_name].attribs['vertical-align'] = v_al
-
-        #for _, curr_style in cell_styles.items():
-        #    print(curr_style.attribs['name'], curr_style.attribs['text-align'])
+        # Compile the number formats once per data style
+        number_styles = read_number_styles(tree)
 
         # Now select the correct table.
         n = -1
@@ -356,16 +604,18 @@ class Table:
             while n != options['sheet']:
                 tree = next(iterator)
                 n += 1
-        except StopIteration as e:
-            print(80*'-')
-            print()
-            print('Table number {} not found in the file {}.'.format(options['sheet'], filename))
-            print()
-            print(80*'-')
-            raise e
+        except StopIteration:
+            raise Exception('Table number {} not found in the file {}.'.format(
+                options['sheet'], options['filename'])) from None
+
 
+        # Find the rows and columns to read. Hidden ones are dropped here if
+        # required, before allocating the table.
+        hidden_values = ['collapse', 'filter'] if options['skip_hidden'] else []
 
-        # Count number of rows
+        visibility_key = etree.QName(ns['table'],'visibility')
+
+        rows = []
         nrows = 0
         for row in tree.iter(etree.QName(ns['table'],'table-row')):
             nrep = 1
@@ -373,52 +623,83 @@ class Table:
             if key in row.attrib:
                 nrep = int(row.attrib[key])
 
-            nrows += nrep
+            hidden = row.attrib.get(visibility_key) in hidden_values
+            nrows += 0 if hidden else nrep
+
+            rows.append((row, nrep, hidden))
 
-        # Count number of columns
+        columns = []
         ncols = 0
         for col in tree.iter(etree.QName(ns['table'],'table-column')):
             nrep = 1
             key = etree.QName(ns['table'],'number-columns-repeated')
             if key in col.attrib:
                 nrep = int(col.attrib[key])
-            ncols += nrep
+
+            hidden = col.attrib.get(visibility_key) in hidden_values
+            ncols += 0 if hidden else nrep
+
+            columns.append((col, nrep, hidden))
+
+        # Fail before allocating anything of the size of the sheet
+        check_table_size(nrows, ncols, options['max_cells'], options['max_memory'],
+                name=tree.attrib.get(etree.QName(ns['table'],'name')))
+
+        # Position in the table of each row and column of the sheet (-1 for
+        # the hidden ones)
+        def visible_map(entries):
+            ans = []
+            n = 0
+            for _, nrep, hidden in entries:
+                if hidden:
+                    ans.extend(nrep*[-1])
+                else:
+                    ans.extend(range(n, n+nrep))
+                    n += nrep
+            return ans
+
+        row_map = visible_map(rows)
+        col_map = visible_map(columns)
 
         table = cls(nrows,ncols)
-        iterator = table.all_elements()
 
-        # Read all the default cell style in each column
-        column_default_styles = table.w*[None]
+        # Index of each data style in table.formatters
+        format_index = {}
+        for name, formatter in number_styles.items():
+            format_index[name] = len(table.formatters)
+            table.formatters.append(formatter)
 
-        n = 0
-        for col in tree.iter(etree.QName(ns['table'],'table-column')):
-            nrep = 1
-            key = etree.QName(ns['table'],'number-columns-repeated')
-            if key in col.attrib:
-                nrep = int(col.attrib[key])
+        # Read all the default cell style in each column
+        column_default_styles = []
 
+        for col, nrep, _ in columns:
             key = etree.QName(ns['table'],'default-cell-style-name')
-            for _ in range(nrep):
-                column_default_styles[n] = col.attrib[key]
-                n+=1
+            column_default_styles.extend(nrep*[col.attrib[key]])
 
-        # Read all the cells in the table
-        for row in tree.iter(etree.QName(ns['table'],'table-row')):
-            key = etree.QName(ns['table'],'number-rows-repeated')
-            nrep_row = 1
-            if key in row.attrib:
-                nrep_row = int(row.attrib[key])
+        cell_tag    = etree.QName(ns['table'],'table-cell')
+        covered_tag = etree.QName(ns['table'],'covered-table-cell')
 
+        # Read all the cells in the table. (y0,x0) are the coordinates in the
+        # sheet, and (y,x) the coordinates in the table.
+        y0 = 0
+        for row, nrep_row, _ in rows:
             for _ in range(nrep_row):
-                for cell in row.iter(etree.QName(ns['table'],'table-cell')):
+                x0 = 0
+                for cell in row:
+                    if cell.tag != cell_tag and cell.tag != covered_tag:
+                        continue
+
                     key = etree.QName(ns['table'],'number-columns-repeated')
                     nrep = 1
                     if key in cell.attrib:
                         nrep = int(cell.attrib[key])
 
+                    # Cells covered by a merged cell are set when reading it
+                    if cell.tag == covered_tag:
+                        x0 += nrep
+                        continue
+
                     for _ in range(nrep):
-                        y,x = next(iterator)
-                        
                         nrows_spanned = 1
                         ncols_spanned = 1
 
@@ -432,6 +713,20 @@ class Table:
                         if key in cell.attrib:
                             nrows_spanned = int(cell.attrib[key])
 
+                        # Keep only the visible rows and columns of the cell.
+                        # It starts at the first of them.
+                        visible_rows = [n for n in row_map[y0:y0+nrows_spanned] if n >= 0]
+                        visible_cols = [n for n in col_map[x0:x0+ncols_spanned] if n >= 0]
+                        style_x0 = x0
+                        x0 += 1
+
+                        if not visible_rows or not visible_cols:
+                            continue
+
+                        y, x = visible_rows[0], visible_cols[0]
+                        nrows_spanned = len(visible_rows)
+                        ncols_spanned = len(visible_cols)
+
                         # Now merge cells if required
                         if nrows_spanned > 1 or ncols_spanned > 1:
                             table.merge_cells(y,x,nrows_spanned,ncols_spanned) 
@@ -447,28 +742,50 @@ class Table:
                         if key in cell.attrib:
                             style_name = cell.attrib[key]
                         else:
-                            style_name = column_default_styles[x]
+                            style_name = column_default_styles[style_x0]
+
+                        style = cell_styles[style_name].attribs
 
                         # Set borders
-                        borders = cell_styles[style_name].attribs['borders']
-                        table.set_borders(y,x,borders)
+                        table.set_borders(y,x,style['borders'])
 
-                        # Set text alignment
-                        if cell_styles[style_name].attribs['text-align'] == 'Default':
-                            key = etree.QName(ns['office'],'value-type')
+                        key = etree.QName(ns['office'],'value-type')
+                        if key in cell.attrib:
+                            value_type = cell.attrib[key]
+                        else:
+                            value_type = None
+
+                        # Read the numeric value and its number format
+                        if value_type in NUMERIC_VALUE_TYPES:
+                            key = etree.QName(ns['office'],'value')
                             if key in cell.attrib:
-                                value_type = cell.attrib[key]
-                            else:
-                                value_type = None
+                                table.values[y,x] = float(cell.attrib[key])
+                            # else: keep the displayed text, and the value NaN
+
+                            data_style = style['data-style']
+                            if data_style not in format_index and data_style in cell_styles.number_styles:
+                                # Number style of a common style in styles.xml
+                                format_index[data_style] = len(table.formatters)
+                                table.formatters.append(cell_styles.number_styles[data_style])
+                            if data_style in format_index:
+                                table.number_formats[y,x] = format_index[data_style]
+                            elif value_type == 'percentage':
+                                table.number_formats[y,x] = NO_FORMAT_PERCENTAGE
+                            elif value_type == 'currency':
+                                table.number_formats[y,x] = NO_FORMAT_CURRENCY
 
+                        # Set text alignment
+                        if style['text-align'] == 'Default':
                             if value_type == 'string' or value_type == None:
                                 table.text_alignments[y,x] = 'start'
-                            elif value_type == 'float':
+                            elif value_type in NUMERIC_VALUE_TYPES:
                                 table.text_alignments[y,x] = 'end'
                             else:
                                 raise Exception('Unknown value type: {}'.format(value_type))
                         else:
-                            table.text_alignments[y,x] = cell_styles[style_name].attribs['text-align']
+                            table.text_alignments[y,x] = style['text-align']
+
+                y0 += 1
 
 
         if options['print_debug_info']:
@@ -499,6 +816,10 @@ class Table:
             print(table.text_alignments)
             print()
             print(80*'-')
+            print('Numeric values: ')
+            print(table.values)
+            print()
+            print(80*'-')
             print()
             print('End debug information.')
             print(80*'+')
@@ -507,76 +828,125 @@ class Table:
 
 
     def draw_horizontal_border(self,y):
-        borders = self.borders_top[y,:]
+        # Most rows have no border at all: check them without unpacking
+        if not self.borders_top.any(y):
+            return ''
 
-        lines = []
-        draw  = []
-        n = 0
+        borders = self.borders_top[y]
 
-        status = borders[0]
+        if borders.all():
+            return '\\hline\n'
 
-        for x in range(self.w):
-            if borders[x] == status:
-                n += 1
-            else:
-                lines.append(n)
-                draw.append(status)
-                n = 1
+        # Runs of consecutive drawn borders, one \cline each
+        changes = np.diff(np.concatenate([[0], borders.view(np.int8), [0]]))
+        starts = np.flatnonzero(changes == 1)
+        ends   = np.flatnonzero(changes == -1)
 
-            status = borders[x]
-            if x == self.w-1:
-                lines.append(n)
-                draw.append(status)
-                n = 1
+        ans = ''.join('\\cline{{{:d}-{:d}}}'.format(start+1, end)
+                for start, end in zip(starts.tolist(), ends.tolist()))
 
-        ans = ''
-        if len(lines) == 1:
-            if draw[0]:
-                ans = '\\hline'
-        else:
-            x = 1
-            for n, line in enumerate(lines):
-                if draw[n]:
-                    ans += '\\cline{{{:d}-{:d}}}'.format(x,x+line-1)
+        return ans + '\n'
 
-                x+=line
+    def default_vertical_borders(self):
+        '''
+        Return a list with the default left border of each column (plus the 
+        right border of the table), drawn if most of the cells have it.
+        '''
 
-        if len(ans):
-            ans += '\n'
+        n_drawn = self.borders_left.column_counts()
+        return (n_drawn > self.w/2).tolist()
 
-        return ans
+    def default_alignments(self):
+        '''
+        Return a list with the most common text alignment of each column.
+        '''
+
+        default_alignments = self.w*['center']
+        if self.h == 0:
+            return default_alignments
+
+        ys, xs = np.indices([self.h, self.w])
+        owned = (self.owner[:,:,0] == ys) & (self.owner[:,:,1] == xs)
 
-    def to_latex(self):
+        if np.any(owned & ~np.isin(self.text_alignments, ['start', 'center', 'end'])):
+            raise Exception('Unknown text alignment in table')
+
+        # Ties are resolved in the order start, center, end
+        counts = np.stack([
+            np.count_nonzero(owned & (self.text_alignments == alignment), axis=0)
+            for alignment in ['start', 'center', 'end']
+            ])
+
+        return [['start', 'center', 'end'][n] for n in np.argmax(counts, axis=0)]
+
+    def row_key(self, y):
         '''
-        Return a string containing the latex code to produce the table.
+        Return a key identifying everything the LaTeX code of row <y> depends
+        on: the text, alignments and spans of its cells, its vertical borders
+        and the horizontal border drawn below it.
         '''
-        # First, get the default borders for each column
-        vertical_borders = []
-        for x in range(self.w+1):
-            n_drawn = 0
-            for y in range(self.h):
-                if self.borders_left[y,x]:
-                    n_drawn += 1
 
-            if n_drawn > self.w/2:
-                vertical_borders.append(True)
-            else:
-                vertical_borders.append(False)
+        owners = self.owner[y]
+
+        return (
+                tuple(self.data[y]),
+                self.text_alignments[y].tobytes(),
+                (y - owners[:,0]).tobytes(),
+                owners[:,1].tobytes(),
+                self.sizes[owners[:,0], owners[:,1]].tobytes(),
+                self.borders_left.row_bytes(y),
+                self.borders_top.row_bytes(y+1),
+                )
+
+    def render_row(self, y, vertical_borders, default_alignments, escape=True):
+        '''
+        Return the LaTeX code of row <y>, as a list with the code of each cell
+        (the last one including the line break), and the horizontal border to
+        draw below it.
+        '''
+
+        cells = []
+        borders_left = self.borders_left[y]
 
-        # Now get the default text alignments for each column
-        default_alignments = self.w*['center']
         for x in range(self.w):
-            count = {
-                    'start'  : 0,
-                    'center' : 0,
-                    'end'    : 0
-                    }
+            # Only the first column of each cell (a \\multirow is repeated,
+            # empty, in each of its rows)
+            if self.owner[y,x,1] == x:
+                y0, x0 = self.owner[y,x]
+                h, w = self.get_cell_dimensions(y0,x0)
+
+                text = ''
+                if y0 == y:
+                    text = self.data[y][x]
+                    if escape:
+                        text = cell_text(text)
 
-            for y in range(self.h):
-                if np.all(self.owner[y,x,:] == [y,x]):
-                    count[self.text_alignments[y,x]] += 1
+                cells.append(latex_cell(x, h, w, text, self.text_alignments[y,x],
+                    borders_left, vertical_borders, default_alignments))
 
-                default_alignments[x] = max(count, key=count.get)
+        # Now draw horizontal lines
+        return cells, self.draw_horizontal_border(y+1)
+
+    def latex_lines(self, escape=True, cache=None):
+        '''
+        Return the header, the body and the epilog of the LaTeX code of the
+        table. The body is a list of lines, each of them a list with the code
+        of its cells (horizontal borders are lines with a single cell).
+
+        Parameters:
+        -----------
+
+        escape (bool): escape the LaTeX special characters in the text of the 
+        cells. Cells marked as raw LaTeX (see escape.RAW_LATEX_MARKER) are
+        never escaped.
+
+        cache (RenderCache): if given, reuse the rows that did not change
+        since the last time this cache was used, and store the new ones.
+        '''
+
+        # First, get the default borders and text alignments for each column
+        vertical_borders = self.default_vertical_borders()
+        default_alignments = self.default_alignments()
 
         # Write header
         header = '\\begin{tabular}{'
@@ -597,78 +967,58 @@ class Table:
 
         header += '}\n'
 
-        body = ''
+        if cache is not None:
+            cache.start((tuple(vertical_borders), tuple(default_alignments), escape, self.w))
+
+        lines = []
 
         # Draw the top horizontal border
-        body += self.draw_horizontal_border(0)
+        border = self.draw_horizontal_border(0)
+        if border:
+            lines.append([border[:-1]])
 
         for y in range(self.h):
-            curr_vert_borders = vertical_borders.copy()
-            for x in range(self.w):
+            if cache is None:
+                cells, border = self.render_row(y, vertical_borders, default_alignments, escape)
+            else:
+                key = self.row_key(y)
+                row = cache.get(key)
+                if row is None:
+                    row = self.render_row(y, vertical_borders, default_alignments, escape)
+                    cache.put(key, row)
+                cells, border = row
+
+            lines.append(cells)
+            if border:
+                lines.append([border[:-1]])
+
+        # The body always ends with a line break
+        lines.append([''])
 
-                if self.owner[y,x,1] == x:
-                    y0, x0 = self.owner[y,x]
-                    h, w = self.get_cell_dimensions(y0,x0)
-
-                    pre_str = ''
-                    post_str = ''
-
-                    # Here we produce the alignment string. It is only relevant
-                    # if:
-                    #
-                    # a) The borders of the current cell are different from the
-                    #    default ones for this column
-                    # b) The alignment of the current cell is different from
-                    #    the default one for this column
-                    # c) The cell occupies more than one column.
-                    #
-                    # Borders are only drawn to the right, except for the first
-                    # column, where they are also drawn to the left.
-
-                    alignment_str = ''
-                    multicol_required = False
-
-                    # Leftmost border of the table
-                    if x == 0:
-                        if self.borders_left[y,0] != curr_vert_borders[0] or w>1 or self.borders_left[y,1] != curr_vert_borders[1] or self.text_alignments[y,x] != default_alignments[0]:
-                            multicol_required = True
-                            alignment_str += '|' if self.borders_left[y,0] else ''
-
-                    if self.text_alignments[y,x] == 'center':
-                        alignment_str += 'c'
-                    elif self.text_alignments[y,x] == 'start': 
-                        alignment_str += 'l'
-                    else:
-                        alignment_str += 'r'
-
-                    if x==x0 and (w>1 or self.borders_left[y,x+w] != curr_vert_borders[x+w] or self.text_alignments[y,x] != default_alignments[x]) or multicol_required:
-                        multicol_required = True
-                        alignment_str += '|' if self.borders_left[y,x+w] else ''
-
-                    # Now produce a multirow or multicolumn environment if 
-                    # required
-                    if multicol_required:
-                        pre_str += '\\multicolumn{' + str(w) + '}{' + alignment_str + '}{'
-                        post_str += '}'
-
-                    if h > 1:
-                        pre_str += '\\multirow{' + str(h) + '}{*}{'
-                        post_str += '}'
-
-                    text = ''
-                    if y0 == y:
-                        text = self.data[y][x]
-
-                    body += pre_str + text + post_str
-
-                    if x+w < self.w:
-                        body += ' & '
-                    else:
-                        body += '\\\\\n'
-
-            # Now draw horizontal lines
-            body += self.draw_horizontal_border(y+1)
+        if cache is not None:
+            cache.finish()
 
         epilog = '\\end{tabular}\n' 
 
+        return header, lines, epilog
+
+    def to_latex(self, escape=True, cache=None):
+        '''
+        Return a list with the header, the body and the epilog of the LaTeX 
+        code to produce the table.
+
+        Parameters:
+        -----------
+
+        escape (bool): escape the LaTeX special characters in the text of the 
+        cells. Cells marked as raw LaTeX (see escape.RAW_LATEX_MARKER) are
+        never escaped.
+
+        cache (RenderCache): reuse the rows rendered in previous calls (see 
+        latex_lines).
+        '''
+
+        header, lines, epilog = self.latex_lines(escape=escape, cache=cache)
+        body = '\n'.join(' & '.join(cells) for cells in lines)
+
         return [header, body, epilog]
@@ -21,10 +21,10 @@
 
 
 # This is a small script that uses zenity to open up a dialog where you select
-# the .ods file you want to convert to LaTeX.
-# It is very primitive and should be improved in the future.
+# the .ods file you want to convert to LaTeX, and then the sheet to convert.
+# odslatex reads the file only once, and runs zenity itself to choose the
+# sheet.
 
-TMPFILE="/tmp/table.$$"
 FILE=`zenity --file-selection --title="Select a File"` 
 
 case $? in
@@ -34,30 +34,13 @@ case $? in
         exit 1;;
 esac
 
-odslatex --list "$FILE" > "$TMPFILE"
-tail -n+2 "$TMPFILE" > "$TMPFILE"2
-
-NSHEETS=$(cat "$TMPFILE"2 | wc -l)
-
-while read LINE; do
-    OPTIONS+=("$LINE")
-done < "$TMPFILE"2
-
-if [[ $NSHEETS == 1 ]]; then
-    N=0
-else
-    CHOICE=$(zenity --title="Selection" --list\
-        --column="Available sheets:" "${OPTIONS[@]}")
-    N=$(echo $CHOICE | cut -d: -f1)
-    if ! [[ "$N" == ?(-)+([0-9]) ]]; then
-        echo "$N is not a number." >&2; exit 1
-    fi
+if ! TABLE=$(odslatex --picker 'zenity --title=Selection --list --column="Available sheets:"' "$FILE"); then
+    zenity --notification --window-icon="error" --text="No sheet converted."
+    exit 1
 fi
 
-odslatex -n$N "$FILE" | xclip -sel clip
+printf '%s\n' "$TABLE" | xclip -sel clip
 
 zenity --notification --window-icon="info" \
-    --text="Copied!\nLaTeX-converted sheet $N \
+    --text="Copied!\nLaTeX-converted sheet \
            from file\n$FILE copied to clipboard"
-
-rm "$TMPFILE" "$TMPFILE"2
@@ -33,5 +33,8 @@ setup(
         install_requires = [
             'numpy',
             'lxml'
-            ]
+            ],
+        extras_require = {
+            'test' : ['pytest']
+            }
         )
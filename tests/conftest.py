@@ -0,0 +1,67 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pytest
+
+TESTS_DIR    = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_DIR = os.path.join(os.path.dirname(TESTS_DIR), 'examples')
+GOLDEN_DIR   = os.path.join(TESTS_DIR, 'golden')
+
+# Set ODSLATEX_UPDATE_GOLDEN=1 to rewrite the golden files instead of checking
+# them. Review the diff before committing the new files!
+UPDATE_GOLDEN = bool(os.environ.get('ODSLATEX_UPDATE_GOLDEN'))
+
+def example(name):
+    return os.path.join(EXAMPLES_DIR, name)
+
+@pytest.fixture
+def golden():
+    '''
+    Compare a text with the golden file <name> in tests/golden.
+    '''
+
+    def check(name, text):
+        filename = os.path.join(GOLDEN_DIR, name)
+
+        if UPDATE_GOLDEN:
+            with open(filename, 'w') as f:
+                f.write(text)
+            return
+
+        with open(filename, 'r') as f:
+            expected = f.read()
+
+        assert text == expected, 'Output differs from golden file {}'.format(name)
+
+    return check
+
+@pytest.fixture
+def ods_file(tmp_path):
+    '''
+    Write the contents of an .ods file to a temporary file and return its
+    name.
+    '''
+
+    def write(data, name='test.ods'):
+        filename = tmp_path / name
+        filename.write_bytes(data)
+        return str(filename)
+
+    return write
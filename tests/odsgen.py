@@ -0,0 +1,323 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+'''
+Generation of .ods workbooks for the tests.
+
+A workbook is described by a list of sheets and a dictionary of cell styles:
+
+    sheet = {
+            'name'    : 'Sheet1',
+            'columns' : ['Default', 'ce1', ...],  # default style of each column
+            'rows'    : [row, ...],
+            'hidden_columns' : [2, ...],     # optional, collapsed columns
+            }
+
+    row = {'cells' : [cell, ...], 'repeat' : 1, 'visibility' : 'collapse'}
+
+    cell = {
+            'text'    : 'abc',       # displayed text (None for an empty cell)
+            'type'    : 'string',    # office:value-type ('string', 'float',
+                                     # 'percentage' or 'currency')
+            'value'   : 1.5,         # office:value of numeric cells (None to
+                                     # leave it out)
+            'style'   : 'ce1',       # table:style-name
+            'rows'    : 1,           # rows spanned
+            'cols'    : 1,           # columns spanned
+            'repeat'  : 1,           # table:number-columns-repeated
+            'covered' : False,       # covered by a merged cell
+            }
+
+    styles = {'ce1' : {'borders' : [top, right, bottom, left],
+                       'align'   : 'center', 'data-style' : 'N1',
+                       'parent'  : 'Default'}}
+
+    number_styles = {'N1' : 2,       # decimal places of each number style
+                     'P1' : '1%'}    # (percentage style with a '%' suffix)
+
+Common styles, written to styles.xml, are described like the cell styles.
+Their borders can also be None, to leave them unset, and the default cell
+style is given as the common style None:
+
+    named_styles = {'Note' : {'borders' : [True, None, None, None]},
+                    None   : {'align' : 'end'}}
+'''
+
+import random
+import io
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+from xml.sax.saxutils import escape, quoteattr
+
+NAMESPACES = (
+        'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+        'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+        'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+        'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+        'xmlns:number="urn:oasis:names:tc:opendocument:xmlns:datastyle:1.0" '
+        'xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0"'
+        )
+
+MANIFEST = '''<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.3">
+ <manifest:file-entry manifest:full-path="/" manifest:version="1.3" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>
+ <manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>
+</manifest:manifest>
+'''
+
+def cell_style_xml(name, style):
+    if name is None:
+        ans = '<style:default-style style:family="table-cell"'
+    else:
+        ans = '<style:style style:name={} style:family="table-cell"'.format(quoteattr(name))
+        if style.get('parent', 'Default') is not None:
+            ans += ' style:parent-style-name={}'.format(quoteattr(style.get('parent', 'Default')))
+    if style.get('data-style'):
+        ans += ' style:data-style-name={}'.format(quoteattr(style['data-style']))
+    ans += '>'
+
+    borders = style.get('borders', 4*[False])
+    if all(borders):
+        ans += '<style:table-cell-properties fo:border="0.06pt solid #000000"/>'
+    else:
+        props = ''
+        for side, drawn in zip(['top', 'right', 'bottom', 'left'], borders):
+            if drawn is not None:
+                props += ' fo:border-{}="{}"'.format(side, '0.06pt solid #000000' if drawn else 'none')
+        ans += '<style:table-cell-properties{}/>'.format(props)
+
+    if style.get('align'):
+        ans += '<style:paragraph-properties fo:text-align="{}"/>'.format(style['align'])
+
+    ans += '</style:default-style>' if name is None else '</style:style>'
+    return ans
+
+def number_style_xml(name, decimal_places):
+    if isinstance(decimal_places, str):
+        return '<number:percentage-style style:name={}><number:number number:decimal-places="{:d}" number:min-integer-digits="1"/><number:text>%</number:text></number:percentage-style>'.format(
+                quoteattr(name), int(decimal_places.rstrip('%')))
+
+    return '<number:number-style style:name={}><number:number number:decimal-places="{:d}" number:min-integer-digits="1"/></number:number-style>'.format(
+            quoteattr(name), decimal_places)
+
+def cell_xml(cell):
+    tag = 'table:covered-table-cell' if cell.get('covered') else 'table:table-cell'
+
+    attribs = ''
+    if cell.get('style'):
+        attribs += ' table:style-name={}'.format(quoteattr(cell['style']))
+    if cell.get('repeat', 1) > 1:
+        attribs += ' table:number-columns-repeated="{:d}"'.format(cell['repeat'])
+    if cell.get('text') is not None:
+        value_type = cell.get('type', 'string')
+        attribs += ' office:value-type="{}"'.format(value_type)
+        if value_type != 'string' and cell.get('value') is not None:
+            attribs += ' office:value="{!r}"'.format(float(cell['value']))
+    if cell.get('cols', 1) > 1 or cell.get('rows', 1) > 1:
+        attribs += ' table:number-columns-spanned="{:d}" table:number-rows-spanned="{:d}"'.format(
+                cell.get('cols', 1), cell.get('rows', 1))
+
+    if cell.get('text') is None:
+        return '<{}{}/>'.format(tag, attribs)
+
+    return '<{0}{1}><text:p>{2}</text:p></{0}>'.format(tag, attribs, escape(cell['text']))
+
+def content_xml(sheets, styles={}, number_styles={}):
+    '''
+    Return the content.xml of a workbook (see the description of this
+    module).
+    '''
+
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<office:document-content {} office:version="1.3">'.format(NAMESPACES),
+            '<office:automatic-styles>']
+
+    for name, decimal_places in number_styles.items():
+        parts.append(number_style_xml(name, decimal_places))
+
+    for name, style in styles.items():
+        parts.append(cell_style_xml(name, style))
+
+    parts.append('</office:automatic-styles><office:body><office:spreadsheet>')
+
+    for sheet in sheets:
+        parts.append('<table:table table:name={}>'.format(quoteattr(sheet['name'])))
+
+        for n, style in enumerate(sheet['columns']):
+            attribs = ''
+            if n in sheet.get('hidden_columns', []):
+                attribs = ' table:visibility="collapse"'
+            parts.append('<table:table-column table:default-cell-style-name={}{}/>'.format(quoteattr(style), attribs))
+
+        for row in sheet['rows']:
+            attribs = ''
+            if row.get('repeat', 1) > 1:
+                attribs += ' table:number-rows-repeated="{:d}"'.format(row['repeat'])
+            if row.get('visibility'):
+                attribs += ' table:visibility="{}"'.format(row['visibility'])
+            parts.append('<table:table-row{}>'.format(attribs))
+
+            parts.extend(map(cell_xml, row['cells']))
+            parts.append('</table:table-row>')
+
+        parts.append('</table:table>')
+
+    parts.append('</office:spreadsheet></office:body></office:document-content>\n')
+
+    return ''.join(parts)
+
+def styles_xml(named_styles, number_styles={}):
+    '''
+    Return the styles.xml of a workbook with the given common styles and
+    number styles (see the description of this module).
+    '''
+
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<office:document-styles {} office:version="1.3">'.format(NAMESPACES),
+            '<office:styles>']
+
+    for name, decimal_places in number_styles.items():
+        parts.append(number_style_xml(name, decimal_places))
+
+    for name, style in named_styles.items():
+        parts.append(cell_style_xml(name, dict(style, parent=style.get('parent'))))
+
+    parts.append('</office:styles></office:document-styles>\n')
+
+    return ''.join(parts)
+
+def ods_bytes(sheets, styles={}, number_styles={}, named_styles=None,
+        named_number_styles={}):
+    '''
+    Return the contents of an .ods file with the given sheets. styles.xml is
+    only written if <named_styles> is not None.
+    '''
+
+    buf = io.BytesIO()
+    with ZipFile(buf, 'w') as zipobj:
+        zipobj.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet', ZIP_STORED)
+        zipobj.writestr('content.xml', content_xml(sheets, styles, number_styles), ZIP_DEFLATED)
+        if named_styles is not None:
+            zipobj.writestr('styles.xml', styles_xml(named_styles, named_number_styles), ZIP_DEFLATED)
+        zipobj.writestr('META-INF/manifest.xml', MANIFEST, ZIP_DEFLATED)
+
+    return buf.getvalue()
+
+def write_ods(filename, sheets, styles={}, number_styles={}, **kwargs):
+    with open(filename, 'wb') as f:
+        f.write(ods_bytes(sheets, styles, number_styles, **kwargs))
+
+def random_sheet(rng, h, w, name='Sheet1', merge_probability=0.1,
+        words='abcdefghijklmnopqrstuvwxyz', special=''):
+    '''
+    Return a random sheet and its styles. <rng> is a random.Random instance,
+    so the same seed always produces the same sheet.
+
+    The sheet has merged cells, random borders and alignments, and a mix of
+    text and numeric cells. The characters in <special> are sprinkled in the
+    text of the cells.
+    '''
+
+    styles = {}
+    for n in range(8):
+        styles['ce{:d}'.format(n+1)] = {
+                'borders' : [rng.random() < 0.4 for _ in range(4)],
+                'align'   : rng.choice([None, None, 'start', 'center', 'end']),
+                }
+    styles['ce9'] = {'data-style' : 'N1'}
+
+    number_styles = {'N1' : 2}
+
+    columns = [rng.choice(['ce1', 'ce2', 'ce9']) for _ in range(w)]
+
+    # Place the merged cells, so that they never overlap
+    owner = [[None]*w for _ in range(h)]
+    spans = {}
+    for y in range(h):
+        for x in range(w):
+            if owner[y][x] is not None:
+                continue
+
+            rows, cols = 1, 1
+            if rng.random() < merge_probability:
+                rows = rng.randint(1, min(3, h-y))
+                cols = rng.randint(1, min(3, w-x))
+
+                while any(owner[yy][xx] is not None
+                        for yy in range(y, y+rows) for xx in range(x, x+cols)):
+                    if cols > 1:
+                        cols -= 1
+                    else:
+                        rows -= 1
+
+            for yy in range(y, y+rows):
+                for xx in range(x, x+cols):
+                    owner[yy][xx] = (y, x)
+
+            spans[y, x] = (rows, cols)
+
+    rows_list = []
+    for y in range(h):
+        cells = []
+        for x in range(w):
+            if owner[y][x] != (y, x):
+                cells.append({'covered' : True})
+                continue
+
+            rows, cols = spans[y, x]
+            cell = {'rows' : rows, 'cols' : cols}
+
+            kind = rng.random()
+            if kind < 0.4:
+                length = rng.randint(1, 8)
+                cell['text'] = ''.join(rng.choice(words + special) for _ in range(length))
+            elif kind < 0.8:
+                cell['type'] = 'float'
+                cell['value'] = round(rng.uniform(-1000, 1000), 4)
+                cell['text'] = '{:.2f}'.format(cell['value'])
+
+            if rng.random() < 0.6:
+                cell['style'] = rng.choice(list(styles))
+
+            cells.append(cell)
+
+        rows_list.append({'cells' : cells})
+
+    sheet = {'name' : name, 'columns' : columns, 'rows' : rows_list}
+
+    return sheet, styles, number_styles
+
+def random_workbook(seed, h=12, w=6, nsheets=1, **kwargs):
+    '''
+    Return the contents of an .ods file with <nsheets> random sheets (see
+    random_sheet).
+    '''
+
+    rng = random.Random(seed)
+
+    sheets = []
+    styles = {}
+    number_styles = {}
+    for n in range(nsheets):
+        sheet, curr_styles, curr_number_styles = random_sheet(rng, h, w,
+                name='Sheet{:d}'.format(n+1), **kwargs)
+        sheets.append(sheet)
+        styles.update(curr_styles)
+        number_styles.update(curr_number_styles)
+
+    return ods_bytes(sheets, styles, number_styles)
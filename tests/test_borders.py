@@ -0,0 +1,111 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import random
+import numpy as np
+import pytest
+from odslatex.borders import BorderGrid
+from odslatex.table import Table
+
+def test_against_array():
+    rng = random.Random(0)
+    grid = BorderGrid(7, 13)
+    expected = np.zeros([7, 13], dtype=bool)
+
+    for _ in range(200):
+        y = rng.randrange(grid.h)
+        x0 = rng.randrange(grid.w)
+        x1 = rng.randrange(x0, grid.w+1)
+        value = rng.random() < 0.6
+
+        operation = rng.randrange(4)
+        if operation == 0:
+            grid.set_range(y, x0, x1, value)
+            expected[y,x0:x1] = value
+        elif operation == 1:
+            grid[y,x0] = value
+            expected[y,x0] = value
+        elif operation == 2:
+            grid.insert_row(y, copy_from=y)
+            expected = np.insert(expected, y, expected[y,:], axis=0)
+        else:
+            grid.insert_column(x0, copy_from=x0)
+            expected = np.insert(expected, x0, expected[:,x0], axis=1)
+
+        assert grid.shape == expected.shape
+        assert np.array_equal(np.asarray(grid), expected)
+
+    for y in range(grid.h):
+        assert np.array_equal(grid[y], expected[y])
+        assert grid.any(y) == expected[y].any()
+        assert grid[y,-1] == expected[y,-1]
+
+    assert np.array_equal(grid.column_counts(), expected.sum(axis=0))
+    assert grid.nbytes == grid.h*((grid.w+7)//8)
+
+@pytest.mark.parametrize('w', [1, 7, 8, 9, 16, 17, 45])
+def test_set_range(w):
+    # Every range of a few rows, including those that start, end or lie
+    # inside a byte, against a plain boolean grid
+    rng = random.Random(w)
+    grid = BorderGrid(3, w)
+    expected = np.zeros([3, w], dtype=bool)
+
+    for x0 in range(w+1):
+        for x1 in range(x0, w+2):
+            y = rng.randrange(3)
+            value = rng.random() < 0.5
+
+            grid.set_range(y, x0, x1, value)
+            expected[y,x0:x1] = value
+
+            assert np.array_equal(np.asarray(grid), expected)
+
+    # The packed rows never have bits beyond the last column
+    for y in range(3):
+        assert grid.row_bytes(y) == BorderGrid.frombuffer(
+                np.packbits(expected[y], bitorder='little').tobytes(), 1, w).row_bytes(0)
+
+def test_horizontal_borders():
+    table = Table(2, 10)
+    assert table.draw_horizontal_border(0) == ''
+
+    table.borders_top.set_range(0, 0, 10, True)
+    assert table.draw_horizontal_border(0) == '\\hline\n'
+
+    table.borders_top[1,0:3] = True
+    table.borders_top[1,9] = True
+    assert table.draw_horizontal_border(1) == '\\cline{1-3}\\cline{10-10}\n'
+
+def test_insert_copies_neighbours():
+    table = Table(2, 3)
+    table.set_borders(1, 1, [True, True, True, True])
+
+    table.add_row(1)
+    table.add_column(1)
+
+    assert np.asarray(table.borders_top).astype(int).tolist() == [
+            [0, 0, 0, 0],
+            [0, 1, 1, 0],
+            [0, 1, 1, 0],
+            [0, 1, 1, 0]]
+    assert np.asarray(table.borders_left).astype(int).tolist() == [
+            [0, 0, 0, 0, 0],
+            [0, 1, 1, 1, 0],
+            [0, 1, 1, 1, 0]]
@@ -0,0 +1,129 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+'''
+Differential tests: the optimised code in odslatex must produce exactly the
+same results as the reference implementation in reference.py, on randomised
+sheets with merged cells, borders and alignments.
+'''
+
+import os
+import random
+import numpy as np
+import pytest
+from odslatex.table import Table
+from odslatex.cache import RenderCache
+from odslatex.escape import escape_latex, RAW_LATEX_MARKER
+from odslatex.main import convert_table, beautify_body
+import reference
+from conftest import example
+from odsgen import random_workbook
+
+# Set ODSLATEX_DIFFERENTIAL_SEEDS to run more random sheets
+NSEEDS = int(os.environ.get('ODSLATEX_DIFFERENTIAL_SEEDS', 50))
+
+SPECIAL = '&%$#_{}~^\\ '
+
+def reference_latex(filename, which):
+    table = reference.ReferenceTable.from_ods(filename, sheet=which)
+
+    for row in table.data:
+        for x, text in enumerate(row):
+            if text is not None and text.startswith(RAW_LATEX_MARKER):
+                row[x] = text[len(RAW_LATEX_MARKER):]
+            elif text is not None:
+                row[x] = reference.escape_latex(text)
+
+    header, body, epilog = table.to_latex()
+    return ''.join([header, reference.beautify_body(body), epilog])
+
+def outcome(function, *args, **kwargs):
+    '''
+    Return the result of the call, or the type of the exception it raised, so
+    that both implementations can be required to fail in the same way.
+    '''
+
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        return type(e)
+
+def random_sizes(seed):
+    rng = random.Random(seed)
+    return rng.randint(1, 15), rng.randint(1, 8)
+
+@pytest.mark.parametrize('seed', range(NSEEDS))
+def test_reader(ods_file, seed):
+    h, w = random_sizes(seed)
+    filename = ods_file(random_workbook(seed, h=h, w=w, merge_probability=0.2))
+
+    expected = reference.ReferenceTable.from_ods(filename)
+    table = Table.from_ods(filename)
+
+    assert (table.h, table.w) == (expected.h, expected.w)
+    assert table.data == expected.data
+    assert np.array_equal(np.asarray(table.borders_top), expected.borders_top)
+    assert np.array_equal(np.asarray(table.borders_left), expected.borders_left)
+    assert np.array_equal(table.merged, expected.merged)
+    assert np.array_equal(table.owner, expected.owner)
+    assert np.array_equal(table.sizes, expected.sizes)
+    assert np.array_equal(table.text_alignments, expected.text_alignments)
+
+@pytest.mark.parametrize('seed', range(NSEEDS))
+def test_conversion(ods_file, seed):
+    h, w = random_sizes(seed)
+    filename = ods_file(random_workbook(seed, h=h, w=w, merge_probability=0.2, special=SPECIAL))
+
+    assert outcome(convert_table, filename=filename) == outcome(reference_latex, filename, 0)
+
+@pytest.mark.parametrize('name, which', [('fancy.ods', 0), ('fancy.ods', 1), ('fancy.ods', 2), ('instruments.ods', 0)])
+def test_examples(name, which):
+    # Cells are escaped even if they look like LaTeX, unless they are marked
+    # as LaTeX code
+    filename = example(name)
+    assert convert_table(filename=filename, which=which) == reference_latex(filename, which)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_render_cache(ods_file, seed):
+    h, w = random_sizes(seed)
+    filename = ods_file(random_workbook(seed, h=h, w=w, merge_probability=0.2))
+    table = Table.from_ods(filename)
+
+    rng = random.Random(seed)
+    cache = RenderCache()
+
+    for _ in range(5):
+        assert table.to_latex(cache=cache) == table.to_latex()
+
+        y, x = rng.randrange(table.h), rng.randrange(table.w)
+        if table.sizes[y,x,0]:
+            table.set(y, x, rng.choice(['a', 'b', 'c']))
+            table.text_alignments[y,x] = rng.choice(['start', 'center', 'end'])
+
+def test_beautify_body():
+    table = reference.ReferenceTable.from_ods(example('fancy.ods'))
+    _, body, _ = table.to_latex()
+    assert beautify_body(body) == reference.beautify_body(body)
+
+def test_escape():
+    rng = random.Random(0)
+    alphabet = 'ab &%$#_{}~^\\'
+    for _ in range(1000):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        assert escape_latex(text) == reference.escape_latex(text)
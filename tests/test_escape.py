@@ -0,0 +1,76 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest
+from odslatex.escape import cell_text, escape_latex, RAW_LATEX_MARKER
+from odslatex.main import convert_table, convert_formats
+from odsgen import ods_bytes
+
+# Ordinary text that looks a bit like LaTeX, and must be escaped anyway
+FALSE_POSITIVES = [
+        ('Price $5 or $10 & tax', 'Price \\$5 or \\$10 \\& tax'),
+        ('50% of C:\\temp_dir', '50\\% of C:\\textbackslash{}temp\\_dir'),
+        ('$x$ & #1', '\\$x\\$ \\& \\#1'),
+        ('\\textbf{a}_b', '\\textbackslash{}textbf\\{a\\}\\_b'),
+        ('see latex: here', 'see latex: here'),
+        ]
+
+@pytest.mark.parametrize('text, expected', FALSE_POSITIVES)
+def test_escaped(text, expected):
+    assert cell_text(text) == expected == escape_latex(text)
+
+def test_raw():
+    assert cell_text(RAW_LATEX_MARKER + '$E_{\\rm int}$ & 5%') == '$E_{\\rm int}$ & 5%'
+    assert cell_text(RAW_LATEX_MARKER + '\\textbf{a}') == '\\textbf{a}'
+    assert cell_text(RAW_LATEX_MARKER) == ''
+    assert cell_text('') == ''
+
+def sheet(texts):
+    return {'name' : 'Sheet1', 'columns' : len(texts)*['Default'],
+            'rows' : [{'cells' : [{'text' : text} for text in texts]},
+                      {'cells' : [{'text' : 'x'} for _ in texts]}]}
+
+def test_columns():
+    # The escaped separators and comments do not shift or hide columns
+    texts = [text for text, _ in FALSE_POSITIVES]
+    data = ods_bytes([sheet(texts)])
+
+    for name in ['latex', 'booktabs']:
+        text = convert_formats(filename=data, formats=name)[name]
+        first_row = [line for line in text.splitlines() if 'Price' in line][0]
+        cells = first_row.replace('\\&', '').split('&')
+        assert len(cells) == len(texts)
+        assert [cell.strip().rstrip('\\').strip() for cell in cells] == \
+                [expected.replace('\\&', '') for _, expected in FALSE_POSITIVES]
+
+def test_raw_cells():
+    data = ods_bytes([sheet(['a_b', RAW_LATEX_MARKER + '$a_b$'])])
+    text = convert_table(filename=data)
+
+    assert 'a\\_b' in text
+    assert '$a_b$' in text and RAW_LATEX_MARKER not in text
+
+@pytest.mark.parametrize('name', ['markdown', 'html'])
+def test_raw_cells_other_formats(name):
+    data = ods_bytes([sheet(['a_b', RAW_LATEX_MARKER + '$a_b$'])])
+    text = convert_formats(filename=data, formats=name)[name]
+
+    assert 'a_b' in text and '$a_b$' in text
+    assert RAW_LATEX_MARKER not in text
@@ -0,0 +1,59 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from odslatex.main import convert_table, convert_formats, latex_document
+from conftest import example
+from odsgen import random_workbook
+
+EXAMPLE_SHEETS = [
+        ('fancy.ods', 0),
+        ('fancy.ods', 1),
+        ('fancy.ods', 2),
+        ('instruments.ods', 0),
+        ]
+
+@pytest.mark.parametrize('name, which', EXAMPLE_SHEETS)
+def test_examples(golden, name, which):
+    text = convert_table(filename=example(name), which=which)
+    golden('{}.{:d}.tex'.format(name[:-4], which), text)
+
+@pytest.mark.parametrize('name, which', EXAMPLE_SHEETS)
+def test_examples_no_tabular(golden, name, which):
+    text = convert_table(filename=example(name), which=which, write_tabular_environment=False)
+    golden('{}.{:d}.body.tex'.format(name[:-4], which), text)
+
+def test_examples_document(golden):
+    tables = [convert_table(filename=example('fancy.ods'), which=n) for n in range(3)]
+    golden('fancy.document.tex', latex_document(tables))
+
+@pytest.mark.parametrize('which', [0, 1, 2])
+def test_formats(golden, which):
+    texts = convert_formats(filename=example('fancy.ods'), which=which,
+            formats=['booktabs', 'markdown', 'html'])
+
+    golden('fancy.{:d}.booktabs.tex'.format(which), texts['booktabs'])
+    golden('fancy.{:d}.md'.format(which), texts['markdown'])
+    golden('fancy.{:d}.html'.format(which), texts['html'])
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_generated(golden, ods_file, seed):
+    filename = ods_file(random_workbook(seed, special='&%#_{}~^'))
+    text = convert_table(filename=filename, which=0)
+    golden('random_{:d}.tex'.format(seed), text)
@@ -0,0 +1,70 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from odslatex.table import Table
+from odsgen import ods_bytes
+
+STYLES = {'box' : {'borders' : [True, True, True, True]}}
+
+def text(t, **kwargs):
+    return dict(text=t, **kwargs)
+
+COVERED = {'covered' : True}
+
+# A 4x4 sheet. Column 1 and row 2 are hidden. The cell "AB" spans columns 0-1
+# and "M" spans rows 1-2 and columns 2-3.
+SHEET = {
+        'name'    : 'Sheet1',
+        'columns' : 4*['Default'],
+        'hidden_columns' : [1],
+        'rows'    : [
+            {'cells' : [text('AB', cols=2, style='box'), COVERED, text('c'), text('d')]},
+            {'cells' : [text('e'), text('f'), text('M', rows=2, cols=2, style='box'), COVERED]},
+            {'cells' : [text('hidden'), text('j'), COVERED, COVERED], 'visibility' : 'collapse'},
+            {'cells' : [text('m'), text('n'), text('o'), text('p', style='box')], 'visibility' : 'filter'},
+            ],
+        }
+
+def read(ods_file, **opts):
+    return Table.from_ods(ods_file(ods_bytes([SHEET], STYLES)), **opts)
+
+def test_hidden_kept_by_default(ods_file):
+    table = read(ods_file)
+    assert (table.h, table.w) == (4, 4)
+
+def test_skip_hidden(ods_file):
+    table = read(ods_file, skip_hidden=True)
+
+    assert (table.h, table.w) == (2, 3)
+    assert table.data == [['AB', 'c', 'd'], ['e', 'M', '*']]
+
+    # "AB" lost its hidden column, "M" its hidden row
+    assert table.sizes[0,0].tolist() == [1, 1]
+    assert table.sizes[1,1].tolist() == [1, 2]
+    assert not table.merged[0,0] and table.merged[1,2]
+
+    # The borders of the boxed cells are placed on their visible extent
+    assert np.asarray(table.borders_top).tolist() == [
+            [True,  False, False],
+            [True,  True,  True ],
+            [False, True,  True ]]
+    assert np.asarray(table.borders_left).tolist() == [
+            [True,  True,  False, False],
+            [False, True,  False, True ]]
@@ -0,0 +1,94 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import pytest
+from odslatex.table import Table
+from odslatex.reader import BufferReader
+from odslatex.main import convert_formats, list_tables, write_sheets
+from conftest import example
+
+class Pipe(io.RawIOBase):
+    '''
+    A binary file that can only be read in order, like a pipe.
+    '''
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self.data.readinto(b)
+
+def sources(filename):
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    yield data
+    yield bytearray(data)
+    yield memoryview(data)
+    yield io.BytesIO(data)
+    yield io.BufferedReader(Pipe(data))
+
+    with open(filename, 'rb') as f:
+        yield f
+
+@pytest.mark.parametrize('which', [0, 2])
+def test_sources(which):
+    filename = example('fancy.ods')
+    expected = convert_formats(filename=filename, which=which, formats='latex,html')
+
+    for source in sources(filename):
+        assert convert_formats(filename=source, which=which, formats='latex,html') == expected
+
+def test_stream_source():
+    filename = example('fancy.ods')
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    assert Table.from_ods(memoryview(data), sheet=1, stream=True).to_latex() == \
+            Table.from_ods(filename, sheet=1).to_latex()
+
+def test_names(tmp_path):
+    with open(example('fancy.ods'), 'rb') as f:
+        data = f.read()
+
+    assert list_tables(filename=data).startswith('List of sheets from <bytes>:')
+
+    with open(example('fancy.ods'), 'rb') as f:
+        assert list_tables(filename=f).startswith('List of sheets from {}:'.format(example('fancy.ods')))
+
+    # Without a file name there is no dependency file
+    written = write_sheets(filename=data, output_dir=str(tmp_path))
+    assert sorted(written) == sorted(str(tmp_path / name) for name in
+            ['some_data.tex', 'random_table_1.tex', 'some_names.tex'])
+
+def test_buffer_reader():
+    data = bytes(range(10))
+    reader = BufferReader(memoryview(data))
+
+    assert reader.read(3) == bytes([0, 1, 2])
+    assert reader.seek(-2, io.SEEK_END) == 8
+    assert reader.read() == bytes([8, 9])
+    assert reader.read(5) == b''
+    reader.seek(1)
+    assert reader.read(2) == bytes([1, 2])
+    assert reader.tell() == 3
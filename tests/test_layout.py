@@ -0,0 +1,98 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import copy
+import pytest
+from odslatex.table import Table
+from odslatex.layout import Layout, Cell
+from odslatex.renderers import get_renderer, RENDERERS
+from conftest import example
+from odsgen import random_workbook
+
+def small_layout():
+    '''
+    A 2 x 3 layout built by hand, without a table: a header spanning two
+    columns, and a rule below it.
+    '''
+
+    layout = Layout(2, 3)
+    layout.rows = [
+            [Cell(0, 0, 1, 2, 'a & b', 'center'), Cell(0, 2, 1, 1, 'c', 'start')],
+            [Cell(1, 0, 1, 1, 'd', 'start'), Cell(1, 1, 1, 1, 'e', 'start'), Cell(1, 2, 1, 1, '1', 'end')],
+            ]
+    layout.column_alignments = ['start', 'start', 'end']
+    layout.rules_top.set_range(1, 0, 3, True)
+    return layout
+
+@pytest.mark.parametrize('name', list(RENDERERS))
+def test_without_table(name):
+    assert get_renderer(name).render(small_layout())
+
+def test_latex_without_table():
+    text = get_renderer('latex').render(small_layout())
+
+    # Compare without the padding added by the beautifier
+    assert [' '.join(line.split()) for line in text.splitlines()] == [
+            '\\begin{tabular}{llr}',
+            '\\multicolumn{2}{c}{a \\& b} & \\multicolumn{1}{l}{c}\\\\',
+            '\\hline',
+            'd & e & 1\\\\',
+            '',
+            '\\end{tabular}',
+            ]
+
+def sources():
+    for which in range(3):
+        yield example('fancy.ods'), which
+    yield example('instruments.ods'), 0
+    for seed in range(20):
+        yield random_workbook(seed, h=10, w=6, merge_probability=0.2), 0
+
+def outcome(function, *args):
+    try:
+        return function(*args)
+    except Exception as e:
+        return type(e)
+
+@pytest.mark.parametrize('filename, which', list(sources()))
+@pytest.mark.parametrize('tabular', [True, False])
+def test_same_as_table(filename, which, tabular):
+    # Rendering from the layout gives the same output as rendering from its
+    # table, also in the rows spanned by a \\multirow
+    layout = Layout.from_table(Table.from_ods(filename, sheet=which))
+    detached = copy.copy(layout)
+    detached.table = None
+
+    renderer = get_renderer('latex', write_tabular_environment=tabular)
+    assert outcome(renderer.render, detached) == outcome(renderer.render, layout)
+
+def test_multirow_without_table():
+    # Without alignments, the rows spanned by a \\multirow take the
+    # alignment of the cell
+    layout = Layout(2, 2)
+    layout.rows = [[Cell(0, 0, 2, 1, 'a', 'center'), Cell(0, 1, 1, 1, 'b', 'start')],
+                   [Cell(1, 1, 1, 1, 'c', 'start')]]
+    layout.column_alignments = ['start', 'start']
+
+    text = get_renderer('latex').render(layout)
+    assert [' '.join(line.split()) for line in text.splitlines()][1:3] == [
+            '\\multicolumn{1}{c}{\\multirow{2}{*}{a}} & b\\\\',
+            '\\multicolumn{1}{c}{\\multirow{2}{*}{}} & c\\\\',
+            ]
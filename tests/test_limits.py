@@ -0,0 +1,70 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import tracemalloc
+import argparse
+import numpy as np
+import pytest
+from odslatex.table import Table, index_dtype, check_table_size
+from odslatex.main import parse_size, convert_table
+from odsgen import ods_bytes
+
+def test_index_dtype():
+    assert index_dtype(10, 4000) == np.int16
+    assert index_dtype(10, 5000) == np.int32
+    assert index_dtype(10**9, 10) == np.int64
+
+    table = Table(3, 4)
+    assert table.owner.dtype == np.int16 and table.sizes.dtype == np.int16
+    assert table.owner[2,3].tolist() == [2, 3]
+
+@pytest.mark.parametrize('h, w', [(200, 30), (50, 5000)])
+def test_estimate_memory(h, w):
+    tracemalloc.start()
+    try:
+        table = Table(h, w)
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert abs(Table.estimate_memory(h, w) - memory) < 0.05*memory
+
+def test_limits(ods_file):
+    # A billion repeated rows: the limits must be checked before allocating
+    sheets = [{'name' : 'Huge', 'columns' : 3*['Default'], 'rows' : [
+        {'cells' : [{'text' : 'a'}, {}, {}]},
+        {'cells' : [{}, {}, {}], 'repeat' : 10**9}]}]
+    filename = ods_file(ods_bytes(sheets))
+
+    with pytest.raises(Exception, match='Sheet Huge .* more than the limit of 1000 \\(--max-cells\\)'):
+        Table.from_ods(filename, max_cells=1000)
+
+    with pytest.raises(Exception, match='--max-memory'):
+        convert_table(filename=filename, max_memory=parse_size('1G'))
+
+    check_table_size(10, 10, max_cells=100, max_memory=Table.estimate_memory(10, 10))
+
+def test_parse_size():
+    assert parse_size('1000') == 1000
+    assert parse_size('512M') == 512*1024**2
+    assert parse_size('1.5g') == 3*1024**3//2
+    assert parse_size('2KiB') == 2048
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size('2X')
@@ -0,0 +1,81 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import io
+import threading
+import zipfile
+import pytest
+from odslatex.main import convert_many, convert_formats
+from conftest import example
+from odsgen import random_workbook
+
+def sources():
+    yield example('fancy.ods')
+    yield example('instruments.ods')
+    for seed in range(6):
+        yield random_workbook(seed, h=20, w=6)
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_results(max_workers):
+    expected = [convert_formats(filename=source, formats='latex,html') for source in sources()]
+    conversions = convert_many(sources(), max_workers=max_workers, formats='latex,html')
+
+    assert [conversion.texts for conversion in conversions] == expected
+    assert [conversion.error for conversion in conversions] == len(expected)*[None]
+    assert conversions[0].source == example('fancy.ods')
+
+def test_errors():
+    data = random_workbook(1)
+    conversions = convert_many([data, b'junk', io.BytesIO(data), example('missing.ods'), 100000*b'x'],
+            which=0, max_workers=2)
+
+    assert conversions[0].texts == conversions[2].texts == {'latex' : convert_formats(filename=data)['latex']}
+    assert isinstance(conversions[3].error, FileNotFoundError)
+
+    # Short and long buffers that are not zip files fail like files would
+    for conversion in [conversions[1], conversions[4]]:
+        assert conversion.texts is None
+        assert isinstance(conversion.error, zipfile.BadZipFile)
+
+    # A sheet that does not exist is an error of its source, not a print
+    conversions = convert_many([example('fancy.ods'), example('instruments.ods')], which=2)
+    assert conversions[0].error is None
+    assert 'Table number 2 not found' in str(conversions[1].error)
+
+def test_arguments():
+    assert convert_many([]) == []
+
+    with pytest.raises(Exception):
+        convert_many([example('fancy.ods')], filename=example('fancy.ods'))
+
+def test_concurrent_calls():
+    expected = convert_many(sources())
+    results = []
+
+    def run():
+        results.append(convert_many(sources(), max_workers=3))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == 4*[expected]
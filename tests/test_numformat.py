@@ -0,0 +1,110 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import sys
+import numpy as np
+import pytest
+from lxml import etree
+from odslatex.numformat import number_formatter, compile_number_style
+from odslatex.table import Table
+from odslatex.main import main, convert_table
+from odsgen import ods_bytes, NAMESPACES
+
+@pytest.mark.parametrize('args, values, expected', [
+        ((0, 3), [-5, 5, 0], ['-005', '005', '000']),
+        ((2, 3), [-5.125, 12.5], ['-005.12', '012.50']),
+        ((2,), [-0.004, 1234.5, -1234.567], ['-0.00', '1234.50', '-1234.57']),
+        ((2, 1, True), [-1234567.891, 999.5, 1000], ['-1,234,567.89', '999.50', '1,000.00']),
+        ((0, 1, True), [-1234, 12], ['-1,234', '12']),
+        ((1, 1, False, True), [-0.123, 0.5, 1], ['-12.3%', '50.0%', '100.0%']),
+        ((0, 2, False, True), [-0.05, 0.05], ['-05%', '05%']),
+        ])
+def test_formatter(args, values, expected):
+    assert number_formatter(*args)(values) == expected
+    assert number_formatter(*args)(np.array(values)) == expected
+
+def test_cached():
+    assert number_formatter(2) is number_formatter(2)
+    assert number_formatter(2)([]) == []
+
+def style(xml):
+    return etree.fromstring('<office:styles {}>{}</office:styles>'.format(NAMESPACES, xml))[0]
+
+def test_compile_styles():
+    formatter = compile_number_style(style(
+        '<number:number-style style:name="N1"><number:number number:decimal-places="1" '
+        'number:min-integer-digits="3" number:grouping="true"/></number:number-style>'))
+    assert formatter([-1234.56, 5]) == ['-1,234.6', '005.0']
+
+    formatter = compile_number_style(style(
+        '<number:percentage-style style:name="N2"><number:number number:decimal-places="0"/>'
+        '<number:text>%</number:text></number:percentage-style>'))
+    assert formatter([0.255, -1]) == ['26%', '-100%']
+
+    # Without decimal places the displayed text is kept
+    assert compile_number_style(style(
+        '<number:number-style style:name="N3"><number:number/></number:number-style>')) is None
+
+def workbook():
+    cells = [{'text' : '-1.2', 'type' : 'float', 'value' : -1.2345, 'style' : 'ce1'},
+             {'text' : '3', 'type' : 'float', 'value' : 3, 'style' : 'ce1'},
+             {'text' : 'abc'}]
+    sheet = {'name' : 'Sheet1', 'columns' : 3*['Default'], 'rows' : [{'cells' : cells}]}
+    return ods_bytes([sheet], {'ce1' : {'data-style' : 'N1'}}, {'N1' : 3})
+
+def test_format_numbers():
+    table = Table.from_ods(workbook())
+    assert table.data[0] == ['-1.2', '3', 'abc']
+
+    table.format_numbers()
+    assert table.data[0] == ['-1.234', '3.000', 'abc']
+
+    table.format_numbers(decimal_places=1)
+    assert table.data[0] == ['-1.2', '3.0', 'abc']
+
+    table.format_numbers(decimal_places=0)
+    assert table.data[0] == ['-1', '3', 'abc']
+
+def test_format_percentages():
+    cells = [{'text' : '50%', 'type' : 'percentage', 'value' : 0.5},
+             {'text' : '12.5%', 'type' : 'percentage', 'value' : 0.125, 'style' : 'ce2'},
+             {'text' : '$3.00', 'type' : 'currency', 'value' : 3},
+             {'text' : '7.25', 'type' : 'float', 'value' : None}]
+    sheet = {'name' : 'Sheet1', 'columns' : 4*['Default'], 'rows' : [{'cells' : cells}]}
+    table = Table.from_ods(ods_bytes([sheet], {'ce2' : {'data-style' : 'P1'}}, {'P1' : '1%'}))
+    assert np.isnan(table.values[0,3])
+
+    table.format_numbers()
+    assert table.data[0] == ['50%', '12.5%', '$3.00', '7.25']
+
+    # The percentage sign is kept, the currency and the missing value are not
+    # reformatted
+    table.format_numbers(decimal_places=2)
+    assert table.data[0] == ['50.00%', '12.50%', '$3.00', '7.25']
+
+def test_cli(ods_file, monkeypatch, capsys):
+    filename = ods_file(workbook())
+    monkeypatch.setattr(sys, 'argv', ['odslatex', '--decimal-places', '2', filename])
+
+    main()
+
+    output = capsys.readouterr().out
+    assert output == convert_table(filename=filename, decimal_places=2)
+    assert '-1.23' in output and '3.00' in output and 'abc' in output
@@ -0,0 +1,59 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+import stat
+from odslatex.main import write_if_changed
+
+def mode(filename):
+    return stat.S_IMODE(os.stat(filename).st_mode)
+
+def test_unchanged(tmp_path):
+    filename = str(tmp_path / 'table.tex')
+
+    assert write_if_changed(filename, 'a')
+    assert not write_if_changed(filename, 'a')
+    assert write_if_changed(filename, 'b')
+
+    with open(filename) as f:
+        assert f.read() == 'b'
+
+def test_keeps_mode(tmp_path):
+    filename = str(tmp_path / 'table.tex')
+    write_if_changed(filename, 'a')
+
+    for permissions in [0o600, 0o640, 0o444]:
+        os.chmod(filename, permissions)
+        assert write_if_changed(filename, 'text {:o}'.format(permissions))
+        assert mode(filename) == permissions
+
+    # No temporary file is left behind
+    assert os.listdir(str(tmp_path)) == ['table.tex']
+
+def test_new_file_mode(tmp_path):
+    filename = str(tmp_path / 'table.tex')
+
+    umask = os.umask(0o027)
+    try:
+        write_if_changed(filename, 'a')
+    finally:
+        os.umask(umask)
+
+    assert mode(filename) == 0o640
@@ -0,0 +1,119 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+'''
+Performance regression gate.
+
+The time of each phase of the conversion (parse, render, beautify) is
+measured on a generated workbook and compared with the baselines stored in
+perf_baselines.json. The test fails if a phase is more than
+ODSLATEX_PERF_TOLERANCE percent (25 by default) slower than its baseline.
+
+Timings are divided by the time of a fixed calibration workload, so that the
+baselines can be compared across machines. These tests only run when
+ODSLATEX_PERF is set:
+
+    ODSLATEX_PERF=1 pytest tests/test_performance.py        # check
+    ODSLATEX_PERF=record pytest tests/test_performance.py   # record baselines
+'''
+
+import os
+import json
+import time
+import pytest
+from odslatex.table import Table
+from odslatex.main import beautify_lines
+from conftest import TESTS_DIR
+from odsgen import random_workbook
+
+MODE       = os.environ.get('ODSLATEX_PERF')
+TOLERANCE  = float(os.environ.get('ODSLATEX_PERF_TOLERANCE', 25))
+BASELINES  = os.path.join(TESTS_DIR, 'perf_baselines.json')
+REPEAT     = 5
+
+pytestmark = pytest.mark.skipif(not MODE, reason='set ODSLATEX_PERF to run the performance tests')
+
+def best_time(function, *args, number=1):
+    '''
+    Return the best time per call out of REPEAT runs of <number> calls each,
+    and the result of the last call.
+    '''
+
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(number):
+            result = function(*args)
+        best = min(best, (time.perf_counter() - start)/number)
+
+    return best, result
+
+def calibration():
+    '''
+    A fixed workload of string formatting and dictionary lookups, similar to
+    what the conversion does.
+    '''
+
+    d = {}
+    for n in range(200000):
+        key = '{:d}-{:d}'.format(n % 1000, n)
+        d[key] = key.split('-')
+
+    return len(d)
+
+@pytest.fixture(scope='module')
+def timings(tmp_path_factory):
+    filename = tmp_path_factory.mktemp('perf') / 'large.ods'
+    filename.write_bytes(random_workbook(0, h=2000, w=8, merge_probability=0.02))
+    filename = str(filename)
+
+    unit, _ = best_time(calibration)
+
+    t_parse, table = best_time(Table.from_ods, filename)
+    t_render, (_, lines, _) = best_time(table.latex_lines)
+    t_beautify, _ = best_time(beautify_lines, lines, number=50)
+
+    return {
+            'parse'    : t_parse/unit,
+            'render'   : t_render/unit,
+            'beautify' : t_beautify/unit,
+            }
+
+@pytest.mark.parametrize('phase', ['parse', 'render', 'beautify'])
+def test_phase(timings, phase):
+    if MODE == 'record':
+        baselines = {}
+        if os.path.exists(BASELINES):
+            with open(BASELINES, 'r') as f:
+                baselines = json.load(f)
+
+        baselines[phase] = round(timings[phase], 4)
+
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+            f.write('\n')
+
+        return
+
+    with open(BASELINES, 'r') as f:
+        baseline = json.load(f)[phase]
+
+    limit = baseline*(1 + TOLERANCE/100)
+    assert timings[phase] <= limit, \
+            '{} is {:.0f}% slower than its baseline'.format(phase, 100*(timings[phase]/baseline - 1))
@@ -0,0 +1,66 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+from odslatex.table import Table
+from conftest import example
+
+def test_window():
+    table = Table(1000, 50)
+    for y in range(table.h):
+        for x in range(table.w):
+            table.set(y, x, '{:d},{:d}'.format(y, x))
+
+    # A very long text outside the window must not widen the columns
+    table.set(500, 2, 100*'x')
+
+    lines = table.preview(head=2, tail=1, columns=(1, 3)).splitlines()
+
+    assert lines[0] == '1000 x 50 table, rows 0-1, 999-999 and columns 1-2 shown'
+    assert len(lines) == 5
+    assert '0,1' in lines[1] and '0,2' in lines[1] and '0,3' not in lines[1]
+    assert lines[1].startswith(' ... ') and lines[1].endswith(' ...')
+    assert '999,2' in lines[4]
+    assert max(map(len, lines[1:])) < 40
+
+def test_small_table_is_complete():
+    table = Table.from_ods(example('fancy.ods'), sheet=1)
+    text = table.preview()
+
+    assert '...' not in text
+    assert 'Hello' in text and 'table' in text
+
+def test_repr_uses_window():
+    table = Table(5000, 100)
+    assert len(repr(table).splitlines()) < 30
+
+def test_empty_window():
+    table = Table(100, 10)
+
+    assert table.preview(head=0, tail=2).splitlines()[0] == \
+            '100 x 10 table, rows 98-99 and columns 0-7 shown'
+    assert table.preview(head=3, tail=0).splitlines()[0] == \
+            '100 x 10 table, rows 0-2 and columns 0-7 shown'
+    assert table.preview(head=0, tail=0).splitlines()[0] == \
+            '100 x 10 table, no rows and columns 0-7 shown'
+    assert table.preview(columns=(4, 4)).splitlines()[0] == \
+            '100 x 10 table, rows 0-9, 90-99 and no columns shown'
+    assert table.preview(columns=(20, 30)).splitlines()[0] == \
+            '100 x 10 table, rows 0-9, 90-99 and no columns shown'
+
+    assert Table(0, 0).preview().splitlines()[0] == '0 x 0 table, no rows and no columns shown'
@@ -0,0 +1,76 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import threading
+import pytest
+from lxml import etree
+from zipfile import ZipFile, ZIP_DEFLATED, BadZipFile
+from odslatex import reader
+from odslatex.reader import read_content
+from odslatex.main import convert_table
+from odsgen import random_workbook, MANIFEST
+
+def zip_bytes(content):
+    buf = io.BytesIO()
+    with ZipFile(buf, 'w') as zipobj:
+        zipobj.writestr('content.xml', content, ZIP_DEFLATED)
+        zipobj.writestr('META-INF/manifest.xml', MANIFEST, ZIP_DEFLATED)
+    return buf.getvalue()
+
+def test_stream(ods_file, monkeypatch):
+    # Small chunks, so that the queue fills up and the threads alternate
+    monkeypatch.setattr(reader, 'CHUNK_SIZE', 256)
+    monkeypatch.setattr(reader, 'QUEUE_CHUNKS', 2)
+
+    filename = ods_file(random_workbook(7, h=40, w=8, nsheets=2))
+
+    expected = etree.tostring(read_content(filename))
+    assert etree.tostring(read_content(filename, stream=True)) == expected
+
+    for which in [0, 1]:
+        assert convert_table(filename=filename, which=which, stream=True) == \
+                convert_table(filename=filename, which=which)
+
+def test_parse_error(ods_file, monkeypatch):
+    monkeypatch.setattr(reader, 'CHUNK_SIZE', 16)
+    monkeypatch.setattr(reader, 'QUEUE_CHUNKS', 1)
+
+    filename = ods_file(zip_bytes('<a>' + 1000*'<b/>' + '</c>'))
+
+    with pytest.raises(etree.XMLSyntaxError):
+        read_content(filename, stream=True)
+
+    # The inflating thread is stopped
+    assert not any(thread.name == 'odslatex-inflate' for thread in threading.enumerate())
+
+def test_read_error(ods_file):
+    data = zip_bytes('<a>' + 1000*'<b>text</b>' + '</a>')
+
+    # Break the checksum of content.xml, which is only checked once the whole
+    # file has been inflated
+    with ZipFile(io.BytesIO(data)) as zipobj:
+        crc = zipobj.getinfo('content.xml').CRC.to_bytes(4, 'little')
+    filename = ods_file(data.replace(crc, b'\0\0\0\0'))
+
+    with pytest.raises(BadZipFile):
+        read_content(filename)
+
+    with pytest.raises(BadZipFile):
+        read_content(filename, stream=True)
@@ -0,0 +1,76 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest
+from odslatex.main import (render_formats, convert_formats, latex_document,
+        join_tables, table_packages)
+from odslatex.renderers import Rendering
+from conftest import example
+from odsgen import ods_bytes, random_workbook
+
+def sources():
+    for which in range(3):
+        yield example('fancy.ods'), which
+    yield example('instruments.ods'), 0
+    for seed in range(5):
+        yield random_workbook(seed, h=8, w=5), 0
+
+@pytest.mark.parametrize('filename, which', list(sources()))
+def test_results(filename, which):
+    formats = ['latex', 'booktabs', 'markdown', 'html']
+    results = render_formats(filename=filename, which=which, formats=formats)
+    texts = convert_formats(filename=filename, which=which, formats=formats)
+
+    for name in formats:
+        result = results[name]
+        assert isinstance(result, Rendering)
+        assert result.text == texts[name]
+        assert result.seconds >= 0
+
+        # The packages found while rendering are those the text needs
+        assert result.packages == table_packages(result.text)
+
+    assert results['latex'].rows == results['html'].rows == results['html'].text.count('<tr>')
+
+def test_documents():
+    results = [render_formats(filename=example('fancy.ods'), which=n, formats='latex,booktabs')
+            for n in range(3)]
+
+    for name in ['latex', 'booktabs']:
+        tables = [result[name] for result in results]
+        texts = [result.text for result in tables]
+
+        assert latex_document(tables) == latex_document(texts)
+        assert latex_document(tables[0]) == latex_document(texts[0])
+        assert join_tables(name, tables) == join_tables(name, texts)
+        assert join_tables(name, tables, minimal_latex=True) == latex_document(texts)
+
+    tables = [result['latex'] for result in results]
+    assert join_tables('markdown', tables) == '\n'.join(table.text for table in tables)
+
+def test_packages_not_scanned():
+    # A cell that only mentions multirow does not need the package
+    sheet = {'name' : 'Sheet1', 'columns' : ['Default'],
+            'rows' : [{'cells' : [{'text' : 'multirow'}]}]}
+    result = render_formats(filename=ods_bytes([sheet]))['latex']
+
+    assert result.packages == set()
+    assert '\\usepackage' not in latex_document([result])
+    assert (result.rows, result.columns) == (1, 1)
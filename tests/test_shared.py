@@ -0,0 +1,83 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pickle
+import multiprocessing
+import numpy as np
+import pytest
+from odslatex.table import Table
+from odslatex.shared import ARRAYS
+from conftest import example
+from odsgen import random_workbook
+
+def assert_same(table, expected):
+    assert (table.h, table.w) == (expected.h, expected.w)
+    assert table.data == expected.data
+    for name in ARRAYS:
+        assert np.array_equal(getattr(table, name), getattr(expected, name),
+                equal_nan=name == 'values'), name
+        assert getattr(table, name).dtype == getattr(expected, name).dtype
+    assert np.array_equal(np.asarray(table.borders_top), np.asarray(expected.borders_top))
+    assert np.array_equal(np.asarray(table.borders_left), np.asarray(expected.borders_left))
+    assert [f.args for f in table.formatters] == [f.args for f in expected.formatters]
+
+def render(filename):
+    return Table.attach(filename).to_latex()
+
+def test_round_trip(ods_file, tmp_path):
+    table = Table.from_ods(ods_file(random_workbook(3, special='&%')))
+    table.data[0][0] = None
+    table.data[1][1] = 'ü\0x'
+
+    with table.share(dirname=str(tmp_path)) as shared:
+        attached = Table.attach(shared.filename)
+
+    # The file is gone, but the attached table is still usable
+    assert not os.path.exists(shared.filename)
+    assert_same(attached, table)
+
+    # Its arrays are mapped, not copied, and writable without touching the
+    # file
+    assert not attached.owner.flags.owndata
+    attached.values[:] = 0
+
+    assert_same(pickle.loads(pickle.dumps(table)), table)
+
+def test_processes():
+    table = Table.from_ods(example('fancy.ods'), sheet=0)
+
+    with table.share() as shared:
+        with multiprocessing.get_context('fork').Pool(2) as pool:
+            results = pool.map(render, 2*[shared.filename])
+
+    assert results == 2*[table.to_latex()]
+
+def test_empty(tmp_path):
+    for h, w in [(0, 0), (0, 3), (3, 0)]:
+        table = Table(h, w)
+        with table.share(dirname=str(tmp_path)) as shared:
+            assert_same(Table.attach(shared.filename), table)
+
+def test_not_a_table(tmp_path):
+    filename = tmp_path / 'other'
+    filename.write_bytes(100*b'x')
+
+    with pytest.raises(Exception, match='not a table'):
+        Table.attach(str(filename))
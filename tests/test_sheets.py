@@ -0,0 +1,71 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import pytest
+from odslatex.reader import read_content, list_sheets, column_name
+from odslatex.main import list_tables, convert_table, pick_sheet
+from odsgen import ods_bytes, random_workbook
+from conftest import example
+
+def test_column_name():
+    assert [column_name(x) for x in [0, 25, 26, 51, 52, 701, 702]] == \
+            ['A', 'Z', 'AA', 'AZ', 'BA', 'ZZ', 'AAA']
+
+def test_list_sheets(ods_file):
+    sheets = [
+            {'name' : 'Data', 'columns' : 5*['Default'], 'rows' : [
+                {'cells' : [{}, {}, {}, {}, {}], 'repeat' : 2},
+                {'cells' : [{}, {'text' : 'a'}, {}, {}, {}]},
+                {'cells' : [{}, {}, {'text' : 'b', 'rows' : 2, 'cols' : 2}, {'covered' : True}, {}]},
+                {'cells' : [{}, {}, {'covered' : True}, {'covered' : True}, {}]},
+                ]},
+            {'name' : 'Empty', 'columns' : ['Default'], 'rows' : [{'cells' : [{}]}]},
+            ]
+
+    filename = ods_file(ods_bytes(sheets))
+
+    assert list_sheets(read_content(filename)) == [
+            {'index' : 0, 'name' : 'Data', 'rows' : 5, 'columns' : 5, 'used_range' : {
+                'first_row' : 2, 'last_row' : 4, 'first_column' : 1, 'last_column' : 3,
+                'cells' : 'B3:D5'}},
+            {'index' : 1, 'name' : 'Empty', 'rows' : 1, 'columns' : 1, 'used_range' : None},
+            ]
+
+    assert json.loads(list_tables(filename=filename, format='json')) == list_sheets(read_content(filename))
+    assert list_tables(filename=filename, return_list=True) == ['Data', 'Empty']
+
+def test_shared_content(ods_file):
+    filename = ods_file(random_workbook(5, nsheets=3))
+    content = read_content(filename)
+
+    for which in range(3):
+        assert convert_table(filename=filename, content=content, which=which) == \
+                convert_table(filename=filename, which=which)
+
+def test_pick_sheet():
+    sheets = list_sheets(read_content(example('fancy.ods')))
+
+    assert pick_sheet(sheets[:1], 'false') == 0
+    assert pick_sheet(sheets, 'grep some_names') == 2
+    assert pick_sheet(sheets, 'tail -n 1') == 2
+
+    for command in ['false', 'true', 'echo 7']:
+        with pytest.raises(Exception, match='No sheet selected'):
+            pick_sheet(sheets, command)
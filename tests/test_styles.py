@@ -0,0 +1,165 @@
+# odslatex: an open-source program to convert LibreOffice Calc spreadsheets
+# into LaTeX tables.
+#
+# Copyright (c) 2022, Javier Garcia.
+#
+# This file is part of odslatex.
+#
+# odslatex is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# odslatex is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# odslatex. If not, see <https://www.gnu.org/licenses/>.
+
+
+import io
+import numpy as np
+from lxml import etree
+from odslatex.table import Table
+from odslatex.style import StyleSheet
+from odslatex.reader import read_content, read_styles
+from odslatex.main import convert_formats, write_sheets
+from odsgen import ods_bytes, content_xml, styles_xml
+from conftest import example
+
+def cell(text, style=None, **kwargs):
+    return dict(text=text, style=style, **kwargs)
+
+SHEET = {
+        'name'    : 'Sheet1',
+        'columns' : ['Default', 'Default', 'Default'],
+        'rows'    : [
+            {'cells' : [cell('a', 'ce1'), cell('b', 'ce2'), cell('c')]},
+            {'cells' : [cell('1.5', 'ce3', type='float', value=1.5),
+                        cell('d', 'Note'), cell('e', 'ce4')]},
+            ]
+        }
+
+STYLES = {
+        # Inherits all the borders of Note, and overrides the top one
+        'ce1' : {'parent' : 'Note', 'borders' : [False, None, None, None]},
+        # Inherits the alignment of Heading through Note
+        'ce2' : {'parent' : 'Note', 'borders' : 4*[None]},
+        # Inherits its number style from styles.xml
+        'ce3' : {'parent' : 'Number', 'borders' : 4*[None]},
+        'ce4' : {'parent' : 'Missing', 'align' : 'center'},
+        }
+
+NAMED_STYLES = {
+        None      : {'borders' : 4*[None]},
+        'Default' : {'borders' : 4*[None]},
+        'Heading' : {'parent' : 'Default', 'borders' : 4*[None], 'align' : 'center'},
+        'Note'    : {'parent' : 'Heading', 'borders' : 4*[True]},
+        'Number'  : {'parent' : 'Default', 'borders' : 4*[None], 'data-style' : 'N9'},
+        }
+
+def workbook(named_styles=NAMED_STYLES):
+    return ods_bytes([SHEET], STYLES, named_styles=named_styles,
+            named_number_styles={'N9' : 3})
+
+def stylesheet(named_styles=NAMED_STYLES):
+    content = etree.fromstring(content_xml([SHEET], STYLES).encode())
+    styles = etree.fromstring(styles_xml(named_styles).encode())
+    return StyleSheet(content, styles)
+
+def test_inheritance():
+    styles = stylesheet()
+
+    assert styles['ce1'].attribs['borders'] == [False, True, True, True]
+    assert styles['ce1'].attribs['text-align'] == 'center'
+    assert styles['ce2'].attribs['borders'] == 4*[True]
+    assert styles['ce2'].attribs['text-align'] == 'center'
+    assert styles['Note'].attribs['name'] == 'Note'
+
+    # Unknown parents and styles end in the default cell style
+    assert styles['ce4'].attribs['borders'] == 4*[False]
+    assert styles['ce4'].attribs['text-align'] == 'center'
+    assert styles['Unknown'].attribs['text-align'] == 'Default'
+
+def test_memoised():
+    styles = stylesheet()
+
+    assert styles['ce1'] is styles['ce1']
+    # The parents were resolved on the way, once
+    assert styles.resolved['Note'] is styles['Note']
+    assert styles.resolved['Heading'] is styles['Heading']
+
+def test_default_style():
+    named = dict(NAMED_STYLES)
+    named[None] = {'borders' : [None, None, True, None], 'align' : 'end'}
+    styles = stylesheet(named)
+
+    # Every chain ends in it
+    assert styles['Note'].attribs['borders'] == 4*[True]
+    assert styles['Number'].attribs['borders'] == [False, False, True, False]
+    assert styles['Number'].attribs['text-align'] == 'end'
+    assert styles['ce4'].attribs['text-align'] == 'center'
+    assert styles['Unknown'].attribs['text-align'] == 'end'
+
+def test_loops():
+    named = dict(NAMED_STYLES, Heading={'parent' : 'Note', 'borders' : [None, None, None, True]})
+    styles = stylesheet(named)
+
+    # The chain is cut where it loops, at Note
+    assert styles['ce2'].attribs['borders'] == 4*[True]
+    assert styles['Heading'].attribs['borders'] == [False, False, False, True]
+
+def test_lazy():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return etree.fromstring(styles_xml(NAMED_STYLES).encode())
+
+    styles = StyleSheet(etree.fromstring(content_xml([SHEET], STYLES).encode()), load)
+    assert calls == []
+
+    styles['ce1']
+    styles['ce2']
+    styles['ce3']
+    assert calls == [1]
+
+def test_table():
+    table = Table.from_ods(workbook())
+
+    assert np.asarray(table.borders_top)[:,:2].tolist() == [
+            [False, True], [True, True], [False, True]]
+    assert table.text_alignments.tolist() == [
+            ['center', 'center', 'start'], ['end', 'center', 'center']]
+
+    # The number style of the common style Number
+    table.format_numbers()
+    assert table.data[1][0] == '1.500'
+
+def test_without_styles():
+    # Without styles.xml the common styles are unknown, as with content only
+    table = Table.from_ods(workbook(named_styles=None))
+    assert table.text_alignments.tolist() == [
+            ['start', 'start', 'start'], ['end', 'start', 'center']]
+    assert not np.asarray(table.borders_top).any()
+
+    tree = read_content(workbook())
+    assert Table.from_content(tree).to_latex() == \
+            Table.from_ods(workbook(named_styles=None)).to_latex()
+
+    assert read_styles(workbook(named_styles=None)) is None
+
+def test_parsed_once(tmp_path):
+    data = workbook()
+    expected = convert_formats(filename=data, formats='latex')
+
+    written = write_sheets(filename=io.BufferedReader(io.BytesIO(data)), output_dir=str(tmp_path))
+    with open(written[0]) as f:
+        assert f.read() == expected['latex']
+
+def test_examples():
+    # The examples only inherit from an empty Default style
+    for name in ['fancy.ods', 'instruments.ods']:
+        tree = read_content(example(name))
+        assert Table.from_content(tree).to_latex() == Table.from_ods(example(name)).to_latex()